@@ -1,29 +1,181 @@
-from backend.services.openai_client import OpenAIClient
+from backend.services.openai_client import (
+    OpenAIClient,
+    forget_cached,
+    invoke_cached,
+    response_text,
+)
 import logging
+import orjson
 
-def generate_answer(nl_query: str, sql_query: str, sql_results: str) -> str:
+# Chart types the frontend can draw; anything else is shown as a table
+_CHART_TYPES = frozenset({"bar", "line", "scatter", "pie", "histogram", "table"})
+
+
+def _results_heading(
+    shown_rows: int | None, total_rows: int | None, truncated: bool
+) -> str:
+    """Introduce the results in a prompt, saying when they are only a sample."""
+    if shown_rows is None or total_rows is None:
+        return "These are the results (in JSON format):"
+    if shown_rows >= total_rows and not truncated:
+        return f"These are all {total_rows} result rows (in JSON format):"
+    total = f"more than {total_rows}" if truncated else str(total_rows)
+    return (
+        f"These are only the first {shown_rows} of {total} result rows "
+        "(in JSON format). Do not present counts, totals or rankings computed "
+        "from these rows as if they covered the full result:"
+    )
+
+
+def generate_answer(
+    nl_query: str,
+    sql_query: str,
+    sql_results: str,
+    shown_rows: int | None = None,
+    total_rows: int | None = None,
+    truncated: bool = False,
+) -> str:
     """
     Use the LLM to generate a natural language summary or answer
     based on the SQL query results.
+    sql_results may be a sample: shown_rows of total_rows (more when truncated).
     """
     client = OpenAIClient()
     llm = client.get_llm()
 
+    # Static instructions first so the provider can reuse the cached prefix
     prompt = f"""
     You are a helpful data analyst assistant.
 
+    Write a clear, human-readable answer that summarizes or interprets
+    the data meaningfully for a non-technical audience.
+
     The user asked:
     "{nl_query}"
 
     The following SQL query was executed:
     {sql_query}
 
-    These are the results (in JSON format):
+    {_results_heading(shown_rows, total_rows, truncated)}
     {sql_results}
+    """
+    logging.info(
+        "🧠 Generating answer from LLM. with %s, %s, %s",
+        nl_query,
+        sql_query,
+        sql_results,
+    )
+    response = invoke_cached(llm, prompt)
+    # invoke_cached already reuses the response for an identical prompt
+    return response_text(response)
 
-    Write a clear, human-readable answer that summarizes or interprets
-    the data meaningfully for a non-technical audience.
+
+def generate_answer_and_visualization(
+    nl_query: str,
+    sql_query: str,
+    sql_results: str,
+    shown_rows: int | None = None,
+    total_rows: int | None = None,
+    truncated: bool = False,
+) -> dict:
+    """
+    Use a single LLM call to produce both the natural language answer
+    and the visualization recommendation for the SQL query results.
+    sql_results may be a sample: shown_rows of total_rows (more when truncated).
+
+    Returns:
+        dict: {"answer": str, "visualization": dict}
+
+    Raises:
+        ValueError: if the LLM response is not the expected JSON object.
+    """
+    client = OpenAIClient()
+    llm = client.get_llm()
+
+    # Static instructions first so the provider can reuse the cached prefix
+    prompt = f"""
+    You are a helpful data analyst and data visualization assistant.
+
+    Complete two tasks for the data below:
+    1. Write a clear, human-readable answer that summarizes or interprets
+       the data meaningfully for a non-technical audience.
+    2. Suggest the most suitable visualization for this data.
+
+    Respond strictly in JSON with:
+    {{
+      "answer": "<answer text>",
+      "visualization": {{
+        "type": "bar" | "line" | "scatter" | "pie" | "histogram" | "table",
+        "x_axis": "<column name>",
+        "y_axis": "<column name>",
+        "title": "<short descriptive title>",
+        "reason": "<brief reasoning>"
+      }}
+    }}
+
+    The user asked:
+    "{nl_query}"
+
+    The following SQL query was executed:
+    {sql_query}
+
+    {_results_heading(shown_rows, total_rows, truncated)}
+    {sql_results}
+    """
+    logging.info("🧠 Generating answer and visualization from LLM for: %s", nl_query)
+    response = invoke_cached(llm, prompt)
+    text = response_text(response).strip()
+
+    # Tolerate a fenced ```json block around the payload
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+
+    try:
+        result = orjson.loads(text)
+        if not isinstance(result, dict) or not isinstance(
+            result.get("visualization"), dict
+        ):
+            raise ValueError("LLM response is missing the answer/visualization object.")
+    except ValueError:
+        # Do not keep serving a malformed reply for this prompt
+        forget_cached(llm, prompt)
+        raise
+
+    return {
+        "answer": str(result.get("answer", "")),
+        "visualization": _normalize_visualization(
+            result["visualization"], _result_columns(sql_results)
+        ),
+    }
+
+
+def _result_columns(sql_results: str) -> list[str]:
+    """Column names of the JSON result rows (empty if they cannot be read)."""
+    try:
+        rows = orjson.loads(sql_results)
+    except orjson.JSONDecodeError:
+        return []
+    if isinstance(rows, list) and rows and isinstance(rows[0], dict):
+        return list(rows[0])
+    return []
+
+
+def _normalize_visualization(viz: dict, columns: list[str]) -> dict:
+    """
+    Fill in a usable recommendation like VisualizationRecommender.recommend_chart:
+    a known chart type, and axes that are columns of the data (first/last by default).
     """
-    logging.info(f"🧠 Generating answer from LLM. with {nl_query}, {sql_query}, {sql_results}")
-    response = llm.invoke(prompt)
-    return getattr(response, "content", str(response))
+    chart_type = viz.get("type")
+    x_axis = viz.get("x_axis")
+    y_axis = viz.get("y_axis")
+    if x_axis not in columns:
+        x_axis = columns[0] if columns else None
+    if y_axis not in columns:
+        y_axis = columns[-1] if len(columns) > 1 else None
+    return {
+        "type": chart_type if chart_type in _CHART_TYPES else "table",
+        "x_axis": x_axis,
+        "y_axis": y_axis,
+        "title": viz.get("title") or "Recommended Visualization",
+        "reason": viz.get("reason", "Based on heuristic and query context"),
+    }
@@ -1,76 +1,100 @@
+import gzip
 import logging
 import azure.functions as func
-import json
-from decimal import Decimal
-from datetime import datetime
-from backend.orchestrator.agent import run_agent
+import orjson
+from backend.orchestrator.warmup import start_warmup
+from backend.utils.json_utils import json_default
 
 
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
+# Worker startup: load the schema and LLM client in the background while the
+# host finishes starting, instead of alongside the first request
+start_warmup()
+
+# Bodies smaller than this go out uncompressed; gzip would not pay for itself
+GZIP_MIN_BYTES = 1024
+# Low level: most of the size win on repetitive row JSON at a fraction of the CPU
+GZIP_LEVEL = 3
 
-def convert_json_compatible(obj):
-    """
-    Recursively convert objects to JSON-serializable types:
-    - Decimal -> float
-    - datetime -> ISO string
-    - nested lists/dicts -> recursively converted
-    """
-    if isinstance(obj, list):
-        return [convert_json_compatible(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: convert_json_compatible(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    elif isinstance(obj, datetime):
-        return obj.isoformat()
-    else:
-        return obj
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip (q > 0, named or via '*')."""
+    qvalues = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.strip().lower()] = q
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0
 
 
 @app.function_name(name="query_agent")
 @app.route(route="query", methods=["POST"])
-def query_agent(req: func.HttpRequest) -> func.HttpResponse:
+async def query_agent(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function endpoint for text-to-SQL agent.
     Expects JSON body: { "query": "..." }
     """
     try:
-        body = req.get_json()
+        # orjson.JSONDecodeError subclasses ValueError -> 400 below
+        body = orjson.loads(req.get_body())
         nl_query = body.get("query")
 
         if not nl_query:
             return func.HttpResponse(
-                json.dumps({"error": "Missing 'query' field."}),
+                orjson.dumps({"error": "Missing 'query' field."}),
                 status_code=400,
                 mimetype="application/json",
             )
 
         logging.info("Received query: %s", nl_query)
 
+        # Deferred: LangChain/pyodbc/pydantic imports are only paid for real queries
+        from backend.orchestrator.agent import run_agent
+        from backend.models.settings import get_settings
+
         # Run the agent
-        result = run_agent(nl_query)
+        result = await run_agent(nl_query)
+
+        # Decimal and other non-native types are handled by json_default;
+        # pretty-print only while developing, production responses are minified
+        development = get_settings().environment == "development"
+        options = orjson.OPT_INDENT_2 if development else 0
+        payload = orjson.dumps(result, default=json_default, option=options)
 
-        # Safely convert all JSON-incompatible objects
-        safe_result = convert_json_compatible(result)
+        # Result sets are the large responses; compress them when the client
+        # accepts gzip. Vary on every response, so shared caches key on the header
+        headers = {"Vary": "Accept-Encoding"}
+        accept_encoding = req.headers.get("Accept-Encoding", "")
+        if len(payload) >= GZIP_MIN_BYTES and _accepts_gzip(accept_encoding):
+            payload = gzip.compress(payload, compresslevel=GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
 
         return func.HttpResponse(
-            json.dumps(safe_result, indent=2),
+            payload,
             status_code=200,
+            headers=headers,
             mimetype="application/json",
         )
 
     except ValueError as ve:
         logging.error("Value error: %s", str(ve))
         return func.HttpResponse(
-            json.dumps({"error": str(ve)}),
+            orjson.dumps({"error": str(ve)}),
             status_code=400,
             mimetype="application/json",
         )
     except Exception as e:
         logging.exception("Unexpected error occurred.")
         return func.HttpResponse(
-            json.dumps({"error": "Internal Server Error", "details": str(e)}),
+            orjson.dumps({"error": "Internal Server Error", "details": str(e)}),
             status_code=500,
             mimetype="application/json",
         )
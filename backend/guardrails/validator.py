@@ -1,13 +1,88 @@
-import yaml
+import os
+import re
+import sys
 import logging
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-import sqlparse
-from sqlparse.sql import IdentifierList, Identifier
-from sqlparse.tokens import Keyword, DML
 from typing import List, Dict, Any
 
+from backend.utils.cache import LRUCache
+
+# yaml and sqlparse are imported on first use to keep module import cheap
+
 logger = logging.getLogger(__name__)
 
+# String literals, quoted identifiers and comments: never executable keywords.
+# Line comments end at \r or \n, as in sqlparse (and SQL Server)
+_NON_CODE_RE = re.compile(
+    r"'(?:[^']|'')*'|\"[^\"]*\"|\[[^\]]*\]|--[^\r\n]*|/\*.*?\*/", re.DOTALL
+)
+
+# Tokens for the SELECT-only fast path: literals/comments (skipped),
+# optionally dotted/quoted identifiers and keywords, and punctuation. A "."
+# outside a dotted identifier ("a . b", "a..b") is its own token
+_IDENT = r"(?:\[[^\]]*\]|\"[^\"]*\"|\w+)"
+_FAST_TOKEN_RE = re.compile(
+    r"'(?:[^']|'')*'|--[^\r\n]*|/\*.*?\*/"
+    rf"|{_IDENT}(?:\.{_IDENT})*"
+    r"|[(),;.]",
+    re.DOTALL,
+)
+# Constructs the fast path does not model; such queries go through sqlparse
+_FAST_PATH_UNSUPPORTED = frozenset({"WITH", "UNION", "INTERSECT", "EXCEPT", "APPLY"})
+# Keywords that end a FROM/JOIN table reference
+_TABLE_CLAUSE_END = frozenset({
+    "WHERE", "GROUP", "ORDER", "HAVING", "ON", "JOIN", "INNER", "LEFT", "RIGHT",
+    "FULL", "OUTER", "CROSS", "OPTION", "FOR", "OFFSET", "FETCH",
+})
+
+# Parsed rules keyed by path -> (mtime, size, rules), bounded LRU
+_RULES_CACHE: "OrderedDict[str, tuple[float, int, dict]]" = OrderedDict()
+_RULES_CACHE_MAXSIZE = 16
+
+
+def _load_rules(rules_path: Path) -> dict:
+    """
+    Load and parse a rules YAML file, reusing the parsed result
+    while the file's mtime and size are unchanged.
+    """
+    key = str(rules_path)
+    stat = os.stat(rules_path)
+    cached = _RULES_CACHE.get(key)
+    if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        _RULES_CACHE.move_to_end(key)
+        return cached[2]
+
+    import yaml
+
+    try:
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:  # libyaml not available
+        from yaml import SafeLoader
+
+    with open(rules_path, "r", encoding="utf-8") as f:
+        rules = yaml.load(f, Loader=SafeLoader) or {}
+
+    _RULES_CACHE[key] = (stat.st_mtime, stat.st_size, rules)
+    _RULES_CACHE.move_to_end(key)
+    while len(_RULES_CACHE) > _RULES_CACHE_MAXSIZE:
+        _RULES_CACHE.popitem(last=False)
+    return rules
+
+
+def _parse_cached(sql: str):
+    """Parse SQL once and reuse the token tree for repeated validations."""
+    # Surrounding whitespace does not change the parse; share one entry
+    return _parse_stripped(sql.strip())
+
+
+@lru_cache(maxsize=1024)
+def _parse_stripped(sql: str):
+    import sqlparse
+
+    return sqlparse.parse(sql)
+
 
 class Guardrails:
     """
@@ -21,11 +96,10 @@ class Guardrails:
 
         # Load rules from YAML
         try:
-            with open(self.rules_path, "r", encoding="utf-8") as f:
-                rules = yaml.safe_load(f) or {}
-            logger.info(f"Loaded guardrail rules from {self.rules_path}")
+            rules = _load_rules(self.rules_path)
+            logger.info("Loaded guardrail rules from %s", self.rules_path)
         except Exception as e:
-            logger.warning(f"Failed to load guardrail rules: {e}. Using defaults.")
+            logger.warning("Failed to load guardrail rules: %s. Using defaults.", e)
             rules = {}
 
         """ self.blocked_keywords: List[str] = [
@@ -34,12 +108,33 @@ class Guardrails:
 
         blocked_keywords_raw = rules.get("blocked_keywords") or []
         self.blocked_keywords = [
-            kw.strip().upper() for kw in blocked_keywords_raw if isinstance(kw, str)
+            sys.intern(kw.strip().upper())
+            for kw in blocked_keywords_raw
+            if isinstance(kw, str)
         ]
         allowed_tables_raw = rules.get("allowed_tables") or []
         self.allowed_tables: List[str] = [
-            tbl.strip().upper() for tbl in allowed_tables_raw if isinstance(tbl, str)
+            sys.intern(tbl.strip().upper())
+            for tbl in allowed_tables_raw
+            if isinstance(tbl, str)
         ]
+        self._blocked_set = frozenset(self.blocked_keywords)
+        # Upper-cased allowed names, matched against both fully-qualified
+        # (schema.table) and simple table references
+        self._allowed_set = frozenset(self.allowed_tables)
+        # Single-pass matcher for all blocked keywords
+        self._kw_regex = (
+            re.compile(
+                r"\b(?:"
+                + "|".join(re.escape(kw) for kw in self.blocked_keywords)
+                + r")\b",
+                re.IGNORECASE,
+            )
+            if self.blocked_keywords
+            else None
+        )
+        # Validation is deterministic per rule set: results keyed by stripped SQL
+        self._results = LRUCache(maxsize=1024)
 
     # ---------------------------------------------------------------------
     # Public API
@@ -54,49 +149,64 @@ class Guardrails:
                 "errors": list[str]
             }
         """
-        errors: List[str] = []
-
         if not sql or not sql.strip():
             return {"ok": False, "errors": ["Empty SQL statement."]}
 
+        key = sql.strip()
+        result = self._results.get(key)
+        if result is None:
+            result = self._validate(sql)
+            self._results.set(key, result)
+        # callers get their own copy of the cached result
+        return {"ok": result["ok"], "errors": list(result["errors"])}
+
+    # ---------------------------------------------------------------------
+    # Helper Methods
+    # ---------------------------------------------------------------------
+    def _validate(self, sql: str) -> Dict[str, Any]:
+        """Run all guardrail checks on a non-empty SQL statement."""
+        errors: List[str] = []
+
+        # --- 1) Blocked keyword detection (before any parsing) ---
+        # one regex pass over the SQL with literals/comments blanked out, so
+        # obviously unsafe statements are rejected without invoking sqlparse
+        if self._kw_regex:
+            code = _NON_CODE_RE.sub(" ", sql)
+            hits = {m.upper() for m in self._kw_regex.findall(code)}
+            if hits:
+                return {
+                    "ok": False,
+                    "errors": [
+                        f"Blocked keyword detected: {kw}"
+                        for kw in self.blocked_keywords
+                        if kw in hits
+                    ],
+                }
+
+        # --- Fast path: plain single SELECT, validated without sqlparse ---
+        fast_result = self._fast_validate(sql)
+        if fast_result is not None:
+            return fast_result
+
         try:
-            parsed = sqlparse.parse(sql)
+            parsed = _parse_cached(sql)
             if not parsed:
                 return {"ok": False, "errors": ["SQL could not be parsed."]}
         except Exception as e:
             return {"ok": False, "errors": [f"SQL parsing error: {e}"]}
 
-        # --- 1) Blocked keyword detection (token-level) ---
-        for kw in self.blocked_keywords:
-            # check token-wise instead of substring to avoid false positives
-            found = False
-            for stmt in parsed:
-                for token in stmt.flatten():
-                    if isinstance(token.value, str) and token.value.strip().upper() == kw:
-                        found = True
-                        break
-                if found:
-                    break
-            if found:
-                errors.append(f"Blocked keyword detected: {kw}")
-
         # --- 2) Allowed table enforcement (uses parsed table names) ---
         if self.allowed_tables:
             used_tables = self._extract_table_names(parsed)
-            # Normalize and compare fully-qualified or simple names
-            unauthorized = []
-            for t in used_tables:
-                if not t:
-                    continue
-                # compare both simple name and fully qualified
-                t_upper = t.upper()
-                simple_name = t_upper.split(".")[-1]
-                if t_upper not in self.allowed_tables and simple_name not in self.allowed_tables:
-                    unauthorized.append(t)
+            unauthorized = self._unauthorized_tables(used_tables)
             if unauthorized:
-                errors.append(f"Unauthorized tables detected: {', '.join(sorted(set(unauthorized)))}")
+                errors.append(
+                    f"Unauthorized tables detected: {', '.join(sorted(unauthorized))}"
+                )
 
         # --- 3) Basic sanity check for DML presence ---
+        from sqlparse.tokens import DML
+
         has_dml = any(
             token.ttype is DML and token.value.upper() in {"SELECT", "UPDATE", "INSERT", "DELETE"}
             for stmt in parsed
@@ -107,63 +217,148 @@ class Guardrails:
 
         return {"ok": not errors, "errors": errors}
 
-    # ---------------------------------------------------------------------
-    # Helper Methods
-    # ---------------------------------------------------------------------
+    def _fast_validate(self, sql: str) -> Dict[str, Any] | None:
+        """
+        Validate a plain single SELECT statement with one regex token pass.
+        Returns None when the query is outside the supported subset
+        (subqueries, CTEs, set operations, multiple statements), in which
+        case the caller falls back to the sqlparse-based validation.
+        Blocked keywords must already have been checked.
+        """
+        tokens = [
+            tok
+            for tok in _FAST_TOKEN_RE.findall(sql)
+            if not tok.startswith(("'", "--", "/*"))
+        ]
+        if not tokens or tokens[0].upper() != "SELECT":
+            return None
+
+        upper = [tok.upper() for tok in tokens]
+        if (
+            upper.count("SELECT") > 1
+            or ";" in tokens[:-1]
+            or "." in tokens  # spaced or omitted name parts: leave to sqlparse
+            or not _FAST_PATH_UNSUPPORTED.isdisjoint(upper)
+        ):
+            return None
+
+        if not self.allowed_tables:
+            return {"ok": True, "errors": []}
+
+        # state: None | "table" (expecting a table) | "alias" (after a table)
+        tables = set()
+        state = None
+        depth = 0
+        for tok, tok_upper in zip(tokens, upper):
+            if tok == "(":
+                depth += 1
+            elif tok == ")":
+                depth -= 1
+            if tok_upper in ("FROM", "JOIN"):
+                if depth:
+                    return None  # e.g. TRIM(x FROM y)
+                state = "table"
+            elif state == "table":
+                if tok in ("(", ")", ",", ";"):
+                    return None
+                parts = [part.strip('[]"') for part in tok.split(".")]
+                if not all(parts):
+                    return None  # e.g. [].secret
+                tables.add(".".join(parts))
+                state = "alias"
+            elif state == "alias":
+                if tok == ",":
+                    state = "table"
+                elif tok == "(":
+                    return None  # table hints, TABLESAMPLE, FOR SYSTEM_TIME ...
+                elif tok_upper in _TABLE_CLAUSE_END or tok in (")", ";"):
+                    state = None
+
+        unauthorized = self._unauthorized_tables(tables)
+        if unauthorized:
+            return {
+                "ok": False,
+                "errors": [
+                    f"Unauthorized tables detected: {', '.join(sorted(unauthorized))}"
+                ],
+            }
+        return {"ok": True, "errors": []}
+
+    def _unauthorized_tables(self, used_tables) -> set:
+        """
+        Return the used tables matching neither a fully-qualified
+        nor a simple allowed name.
+        """
+        allowed = self._allowed_set
+        return {
+            t
+            for t in used_tables
+            if (t_upper := t.upper()) not in allowed
+            and t_upper.rsplit(".", 1)[-1] not in allowed
+        }
+
     def _extract_table_names(self, parsed) -> List[str]:
         """
         Extract table names from parsed SQL statements.
         Returns fully-qualified names where present (schema.table).
         """
+        from sqlparse.sql import IdentifierList, Identifier
+        from sqlparse.tokens import Keyword
+
         tables = set()
 
         for stmt in parsed:
-            from_seen = False
+            # single pass: None | "after_from" | "after_join"
+            state = None
             for token in stmt.tokens:
-                # if we just saw FROM, next identifier(s) are table names
-                if from_seen:
-                    if isinstance(token, IdentifierList):
+                # if we just saw FROM/JOIN, next identifier(s) are table names
+                if state:
+                    if state == "after_from" and isinstance(token, IdentifierList):
                         for identifier in token.get_identifiers():
-                            name = identifier.get_real_name() or identifier.get_name()
-                            # try to get schema if present
-                            fq = identifier.get_name() or name
-                            tables.add(fq)
-                        from_seen = False
+                            tables.add(self._identifier_name(identifier))
+                        state = None
                     elif isinstance(token, Identifier):
-                        name = token.get_real_name() or token.get_name()
-                        fq = token.get_name() or name
-                        tables.add(fq)
-                        from_seen = False
+                        tables.add(self._identifier_name(token))
+                        state = None
                     elif token.ttype is Keyword:
-                        from_seen = False
+                        state = None
                     # else: skip other token types until we hit next meaningful token
-                if token.ttype is Keyword and token.value.upper() == "FROM":
-                    from_seen = True
-
-            # also look for JOIN clauses which reference tables
-            for token in stmt.tokens:
-                if token.ttype is Keyword and token.value.upper() == "JOIN":
-                    # next meaningful token should be an identifier
-                    idx = stmt.token_index(token)
-                    # safe-guard: iterate following tokens to find identifier
-                    for next_tok in stmt.tokens[idx + 1:]:
-                        if isinstance(next_tok, Identifier):
-                            name = next_tok.get_real_name() or next_tok.get_name()
-                            fq = next_tok.get_name() or name
-                            tables.add(fq)
-                            break
-                        if next_tok.ttype is Keyword:
-                            break
+                if token.ttype is Keyword:
+                    value = token.value.upper()
+                    if value == "FROM":
+                        state = "after_from"
+                    elif value == "JOIN":
+                        state = "after_join"
 
         # Filter out empty strings and return list
         return [t for t in tables if t]
 
+    @staticmethod
+    def _identifier_name(identifier) -> str:
+        """Return the referenced name of an identifier (schema-qualified if present)."""
+        name = identifier.get_real_name() or identifier.get_name()
+        return identifier.get_name() or name
+
     # Optional public utility
     def parse_tables(self, sql: str) -> List[str]:
         """Return tables referenced in a SQL query."""
         try:
-            parsed = sqlparse.parse(sql)
+            parsed = _parse_cached(sql)
             return self._extract_table_names(parsed)
         except Exception as e:
-            logger.error(f"Failed to parse tables: {e}")
+            logger.error("Failed to parse tables: %s", e)
             return []
+
+
+# -------------------------------------------------------------------------
+# Shared instance
+# -------------------------------------------------------------------------
+_instance: Guardrails | None = None
+
+
+def get_guardrails() -> Guardrails:
+    """Return the process-wide Guardrails instance, creating it on first use."""
+    global _instance
+    if _instance is None:
+        _instance = Guardrails()
+    return _instance
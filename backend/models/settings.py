@@ -1,17 +1,17 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from backend.utils.env_loader import load_env
 import logging
 
-# Ensure .env is loaded before Pydantic initializes
-ENV_PATH = load_env(".env")
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
-        env_file=ENV_PATH,
         env_file_encoding="utf-8",
         extra="ignore",
         case_sensitive=True,
+        env_nested_delimiter=None,
+        env_parse_none_str="",
     )
 
     azure_openai_deployment: str = Field(..., env="AZURE_OPENAI_DEPLOYMENT")
@@ -19,8 +19,17 @@ class Settings(BaseSettings):
     azure_openai_api_key: str = Field(..., env="AZURE_OPENAI_API_KEY")
     azure_openai_api_version: str = Field("2024-06-01", env="AZURE_OPENAI_API_VERSION")
     sql_connection_string: str = Field(..., env="SQL_CONNECTION_STRING")
+    sql_max_rows: int = Field(10000, env="SQL_MAX_ROWS")
     appinsights_key: str | None = Field(None, env="APPINSIGHTS_KEY")
     environment: str = Field("development", env="ENVIRONMENT")
 
-settings = Settings()
-logging.info(f"✅ Settings initialized from: {ENV_PATH}")
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load .env and build the Settings once, on first use."""
+    # Ensure .env is loaded before Pydantic initializes
+    env_path = load_env(".env")
+    settings = Settings(_env_file=env_path)
+    logging.info("✅ Settings initialized from: %s", env_path)
+    return settings
+
@@ -1,7 +1,7 @@
+import asyncio
 import logging
-import json
 import sys
-from decimal import Decimal
+import threading
 from pathlib import Path
 
 
@@ -12,14 +12,10 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 
-# --- LangChain Imports ---
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.memory import ConversationBufferMemory
-
 # --- Internal Imports ---
 from backend.services.openai_client import OpenAIClient
 from backend.utils.logger import log_with_task
+from backend.utils.json_utils import dumps_rows
 from backend.orchestrator.toolset import (
     sql_generator,
     run_sql_tool,
@@ -27,79 +23,97 @@ from backend.orchestrator.toolset import (
     regenerator_tool,
     visualization_tool,
     answer_generator_tool,
+    summary_and_viz_tool,
+    regenerate_sql,
+    execute_sql,
+    answer_question,
+    recommend_visualization,
+    summarize_and_visualize,
 )
 
 logger = logging.getLogger(__name__)
 MAX_REGENERATIONS = 2
+# Fixes sampled per regeneration call (n completions in one request); the
+# first one passing guardrails wins. Independent of MAX_REGENERATIONS
+REGENERATION_CANDIDATES = 3
+# Rows embedded in LLM prompts; the full result is still returned to the caller
+PROMPT_MAX_ROWS = 50
 PROJECT_TASK = "SQL-Agent"
 
+# Heavy LangChain objects, built lazily once per process
+_SHARED = None
+_SHARED_LOCK = threading.Lock()
 
-# =====================================
-# 🧹 Utility
-# =====================================
-def convert_decimals(obj):
-    """Recursively convert Decimal to float for JSON serialization."""
-    if isinstance(obj, list):
-        return [convert_decimals(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: convert_decimals(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    else:
-        return obj
-
-
-def get_tool_by_name(agent, name: str):
-    """Fetch a specific tool by its name from the agent."""
-    for tool in agent.tools:
-        if tool.name == name:
-            return tool
-    raise ValueError(f"Tool '{name}' not found among: {[t.name for t in agent.tools]}")
+TOOLS = [
+    sql_generator,
+    guardrails_tool,
+    regenerator_tool,
+    run_sql_tool,
+    visualization_tool,
+    answer_generator_tool,
+    summary_and_viz_tool,
+]
+TOOLS_BY_NAME = {t.name: t for t in TOOLS}
 
 
 # =====================================
 # 🧠 Agent Construction
 # =====================================
-def build_agent():
-    """Build the SQL + Visualization LLM agent."""
-    service = OpenAIClient()
-    llm = service.get_llm()
-
-    tools = [
-        sql_generator,
-        guardrails_tool,
-        regenerator_tool,
-        run_sql_tool,
-        visualization_tool,
-        answer_generator_tool,
-    ]
-
-    memory = ConversationBufferMemory(
+def _build_shared():
+    """Build the LLM-bound agent runnable once per process."""
+    global _SHARED
+    if _SHARED is not None:
+        return _SHARED
+
+    with _SHARED_LOCK:
+        if _SHARED is not None:
+            return _SHARED
+
+        from langchain.agents import create_tool_calling_agent
+        from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+        service = OpenAIClient()
+        llm = service.get_llm()
+
+        prompt = ChatPromptTemplate.from_messages([
+            (
+                "system",
+                (
+                    "You are an expert SQL and data visualization agent. "
+                    "You generate SQL queries, validate them, execute them, "
+                    "summarize results, and recommend clear visualizations "
+                    "(bar, line, scatter, pie, etc.) based on data."
+                ),
+            ),
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("human", "{input}"),
+            MessagesPlaceholder(variable_name="agent_scratchpad"),
+        ])
+
+        _SHARED = create_tool_calling_agent(llm=llm, tools=TOOLS, prompt=prompt)
+        return _SHARED
+
+
+def _build_memory():
+    """Create a fresh conversation memory (never shared between requests)."""
+    from langchain.memory import ConversationBufferMemory
+
+    return ConversationBufferMemory(
         memory_key="chat_history",
         input_key="input",
         output_key="output",
         return_messages=True,
     )
 
-    prompt = ChatPromptTemplate.from_messages([
-        (
-            "system",
-            (
-                "You are an expert SQL and data visualization agent. "
-                "You generate SQL queries, validate them, execute them, summarize results, "
-                "and recommend clear visualizations (bar, line, scatter, pie, etc.) based on data."
-            ),
-        ),
-        MessagesPlaceholder(variable_name="chat_history"),
-        ("human", "{input}"),
-        MessagesPlaceholder(variable_name="agent_scratchpad"),
-    ])
 
-    agent = create_tool_calling_agent(llm=llm, tools=tools, prompt=prompt)
+def build_agent():
+    """Build the SQL + Visualization LLM agent with its own conversation memory."""
+    from langchain.agents import AgentExecutor
+
     return AgentExecutor(
-        agent=agent,
-        tools=tools,
-        memory=memory,
+        agent=_build_shared(),
+        tools=TOOLS,
+        memory=_build_memory(),
         verbose=True,
         handle_parsing_errors=True,
     )
@@ -108,37 +122,63 @@ def build_agent():
 # =====================================
 # 🚀 Main Execution
 # =====================================
-def run_agent(nl_query: str, chat_history=None) -> dict:
-    """Execute full pipeline: NL → SQL → Validate → Execute → Answer → Visualization."""
+async def run_agent(nl_query: str, chat_history=None) -> dict:
+    """
+    Execute full pipeline:
+    NL → SQL → Validate → Execute → Answer → Visualization.
+    Blocking LLM, database and validation (sqlparse) calls run in worker
+    threads so concurrent requests are not serialized on the event loop.
+    """
     try:
-        agent = build_agent()
-
         # Fetch tools
-        sql_gen_tool = get_tool_by_name(agent, "sql_generator")
-        guard_tool = get_tool_by_name(agent, "guardrails_tool")
-        regen_tool = get_tool_by_name(agent, "regenerator_tool")
-        run_sql = get_tool_by_name(agent, "run_sql_tool")
-        viz_tool = get_tool_by_name(agent, "visualization_tool")
-        answer_tool = get_tool_by_name(agent, "answer_generator_tool")
+        # (JSON-input tools are bypassed: their plain functions are called directly)
+        sql_gen_tool = TOOLS_BY_NAME["sql_generator"]
+        guard_tool = TOOLS_BY_NAME["guardrails_tool"]
 
         log_with_task(logging.INFO, "Tools loaded successfully", task="Tools-Loading")
 
         # Step 1: Generate SQL
-        sql_query = sql_gen_tool.func(nl_query)
-        log_with_task(logging.INFO, f"Generated SQL: {sql_query}", task="SQL-Generation")
+        sql_query = await asyncio.to_thread(sql_gen_tool.func, nl_query)
+        log_with_task(
+            logging.INFO, "Generated SQL: %s", sql_query, task="SQL-Generation"
+        )
 
         # Step 2: Validate SQL
-        validation_result = guard_tool.func(sql_query)
+        validation_result = await asyncio.to_thread(guard_tool.func, sql_query)
         regenerations = 0
         log_with_task(logging.INFO, "Validating SQL with guardrails", task="SQL-Validation")
 
+        seen_sqls = {sql_query.strip()}
         while validation_result != "VALID" and regenerations < MAX_REGENERATIONS:
-            log_with_task(logging.WARNING, f"SQL invalid (attempt {regenerations + 1})", task="SQL-Validation")
-            regen_input = {"nl_query": nl_query, "bad_sql": sql_query, "errors": validation_result}
-            sql_query = regen_tool.func(json.dumps(regen_input))
-            validation_result = guard_tool.func(sql_query)
+            log_with_task(
+                logging.WARNING,
+                "SQL invalid (attempt %d)",
+                regenerations + 1,
+                task="SQL-Validation",
+            )
+            last_errors = validation_result
+            sql_query = await asyncio.to_thread(
+                regenerate_sql,
+                nl_query,
+                sql_query,
+                validation_result,
+                candidates=REGENERATION_CANDIDATES,
+            )
+            validation_result = await asyncio.to_thread(guard_tool.func, sql_query)
             regenerations += 1
 
+            # Stop retrying when the LLM keeps producing the same SQL or the same errors
+            if validation_result != "VALID" and (
+                sql_query.strip() in seen_sqls or validation_result == last_errors
+            ):
+                log_with_task(
+                    logging.WARNING,
+                    "Regeneration made no progress; giving up early.",
+                    task="SQL-Validation",
+                )
+                break
+            seen_sqls.add(sql_query.strip())
+
         if validation_result != "VALID":
             log_with_task(logging.ERROR, "SQL validation failed after multiple attempts.", task="SQL-Validation")
             return {
@@ -150,12 +190,24 @@ def run_agent(nl_query: str, chat_history=None) -> dict:
 
         # Step 3: Execute SQL
         try:
-            log_with_task(logging.INFO, f"Executing SQL query: {sql_query}", task="SQL-Execution")
-            query_result = run_sql.func(sql_query)
-            data = convert_decimals(query_result.get("rows", []))
+            log_with_task(
+                logging.INFO, "Executing SQL query: %s", sql_query, task="SQL-Execution"
+            )
+            query_result = await execute_sql(sql_query)
+            data = query_result.get("rows", [])
             execution_time = query_result.get("execution_time")
+            truncated = query_result.get("truncated", False)
+            if truncated:
+                log_with_task(
+                    logging.WARNING,
+                    "Result truncated to %d rows",
+                    len(data),
+                    task="SQL-Execution",
+                )
         except Exception as e:
-            log_with_task(logging.ERROR, f"SQL execution failed: {e}", task="SQL-Execution")
+            log_with_task(
+                logging.ERROR, "SQL execution failed: %s", e, task="SQL-Execution"
+            )
             return {"sql_query": sql_query, "validation": "VALID", "error": str(e)}
 
         if not data:
@@ -168,14 +220,39 @@ def run_agent(nl_query: str, chat_history=None) -> dict:
                 "execution_time": execution_time
             }
 
-        # Step 4: Generate Answer
-        answer_input = {"query": nl_query, "sql": sql_query, "data": data}
-        answer = answer_tool.func(json.dumps(answer_input))
-        log_with_task(logging.INFO, "Generated LLM answer.", task="Answer-Generation")
+        # Steps 4 & 5: Generate Answer and Recommend Visualization in one LLM call
+        prompt_rows = data[:PROMPT_MAX_ROWS]
+        rows_json = dumps_rows(prompt_rows)
+        # Tell the LLM when it only sees a sample, so it does not count or
+        # rank over the first PROMPT_MAX_ROWS rows as if they were everything
+        row_counts = {
+            "shown_rows": len(prompt_rows),
+            "total_rows": len(data),
+            "truncated": truncated,
+        }
+        summary = await asyncio.to_thread(
+            summarize_and_visualize, nl_query, sql_query, rows_json, **row_counts
+        )
 
-        # Step 5: Recommend Visualization
-        viz_input = {"nl_query": nl_query, "sql_query": sql_query, "data": data}
-        viz_recommendation = viz_tool.func(json.dumps(viz_input))
+        if "error" not in summary:
+            answer, viz_recommendation = summary["answer"], summary["visualization"]
+        else:
+            # Fall back to separate answer and visualization calls, run concurrently
+            log_with_task(
+                logging.WARNING,
+                "Combined generation failed: %s",
+                summary["error"],
+                task="Answer-Generation",
+            )
+            answer, viz_recommendation = await asyncio.gather(
+                asyncio.to_thread(
+                    answer_question, nl_query, sql_query, rows_json, **row_counts
+                ),
+                asyncio.to_thread(
+                    recommend_visualization, nl_query, sql_query, prompt_rows
+                ),
+            )
+        log_with_task(logging.INFO, "Generated LLM answer.", task="Answer-Generation")
         log_with_task(logging.INFO, "Visualization recommendation complete.", task="Visualization-Recommendation")
 
         return {
@@ -186,8 +263,12 @@ def run_agent(nl_query: str, chat_history=None) -> dict:
             "visualization": viz_recommendation,
             "regenerations_used": regenerations,
             "execution_time": execution_time,
+            "row_count": len(data),
+            "truncated": truncated,
         }
 
     except Exception as e:
-        log_with_task(logging.ERROR, f"Agent execution failed: {e}", task="Agent-Execution")
+        log_with_task(
+            logging.ERROR, "Agent execution failed: %s", e, task="Agent-Execution"
+        )
         return {"error": str(e)}
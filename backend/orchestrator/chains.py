@@ -1,16 +1,19 @@
 from backend.services.openai_client import OpenAIClient
 from langchain.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from functools import lru_cache
 from pathlib import Path
 
 
 BASE_PROMPT_DIR = Path(__file__).parent / "prompts"
 
 
+@lru_cache(maxsize=None)
 def load_prompt(file: str) -> str:
     return (BASE_PROMPT_DIR / file).read_text()
 
 
+@lru_cache(maxsize=None)
 def get_sql_generation_chain():
     """Chain for generating SQL from natural language."""
     llm = OpenAIClient().get_llm()
@@ -22,13 +25,19 @@ def get_sql_generation_chain():
     return prompt | llm | StrOutputParser()
 
 
-def get_regeneration_chain():
-    """Chain for regenerating SQL when it fails guardrails or execution."""
-    llm = OpenAIClient().get_llm()
+@lru_cache(maxsize=None)
+def get_regeneration_prompt() -> ChatPromptTemplate:
+    """Prompt for regenerating SQL when it fails guardrails or execution."""
     template = load_prompt("regenerator_prompt.txt")
 
-    prompt = ChatPromptTemplate.from_messages(
+    return ChatPromptTemplate.from_messages(
         [("system", template),
          ("user", "Query: {nl_query}\nBad SQL: {bad_sql}\nErrors: {errors}\nSchema: {schema}")]
     )
-    return prompt | llm | StrOutputParser()
+
+
+@lru_cache(maxsize=None)
+def get_regeneration_chain():
+    """Chain for regenerating SQL when it fails guardrails or execution."""
+    llm = OpenAIClient().get_llm()
+    return get_regeneration_prompt() | llm | StrOutputParser()
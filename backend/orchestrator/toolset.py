@@ -1,19 +1,16 @@
 from langchain.tools import tool
-from backend.sql_executor.executor import SQLExecutor
-from backend.sql_executor.schema_cache import SchemaCache
-from backend.guardrails.validator import Guardrails
-from backend.sql_generator.generator import SQLGenerator
-from backend.regenerator.fixer import SQLRegenerator
-from backend.services.openai_client import OpenAIClient
-from backend.answer_generator.answer_generator import generate_answer
-from backend.visualization.visualisation_recommander import VisualizationRecommender
-import json
+from backend.sql_executor.schema_cache import get_schema_cache
+from backend.guardrails.validator import get_guardrails
+from backend.utils.json_utils import dumps_rows
 import logging
+import orjson
+
+# Tool backends (LLM clients, pyodbc, pandas/altair) are imported inside the
+# functions that use them, so importing this module stays cheap
 
 # Initialize shared services
-guard = Guardrails()
-schema_cache = SchemaCache()
 logger = logging.getLogger(__name__)
+schema_cache = get_schema_cache()
 
 
 # ========================================
@@ -22,6 +19,8 @@ logger = logging.getLogger(__name__)
 @tool("sql_generator", return_direct=True)
 def sql_generator(input_str: str) -> str:
     """Generate SQL from a natural language query."""
+    from backend.sql_generator.generator import SQLGenerator
+
     generator = SQLGenerator()
     return generator.generate(nl_query=input_str)
 
@@ -29,9 +28,21 @@ def sql_generator(input_str: str) -> str:
 # ========================================
 # ⚙️ RUN SQL QUERY
 # ========================================
+async def execute_sql(query: str) -> dict:
+    """
+    Execute a SQL query for async in-process callers
+    without blocking the event loop.
+    """
+    from backend.sql_executor.executor import SQLExecutor
+
+    return await SQLExecutor().arun_query(query)
+
+
 @tool("run_sql_tool", return_direct=True)
 def run_sql_tool(query: str) -> dict:
     """Execute a SQL query against the database."""
+    from backend.sql_executor.executor import SQLExecutor
+
     executor = SQLExecutor()
     return executor.run_query(query)
 
@@ -42,7 +53,7 @@ def run_sql_tool(query: str) -> dict:
 @tool("guardrails_tool", return_direct=True)
 def guardrails_tool(query: str) -> str:
     """Validate the SQL query using guardrails."""
-    result = guard.validate(query)
+    result = get_guardrails().validate(query)
     if not result["ok"]:
         return f"Invalid SQL: {result['errors']}"
     return "VALID"
@@ -51,6 +62,20 @@ def guardrails_tool(query: str) -> str:
 # ========================================
 # 📊 VISUALIZATION RECOMMENDER 
 # ========================================
+def recommend_visualization(nl_query: str, sql_query: str, rows: list[dict]) -> dict:
+    """Recommend a visualization for in-process callers (no JSON round-trip)."""
+    try:
+        from backend.visualization.visualisation_recommander import (
+            VisualizationRecommender,
+        )
+
+        recommender = VisualizationRecommender(nl_query, sql_query, rows)
+        return recommender.recommend_chart()
+    except Exception as e:
+        logger.exception("Visualization recommendation failed: %s", e)
+        return {"error": str(e)}
+
+
 @tool("visualization_tool", return_direct=True)
 def visualization_tool(input_str: str) -> dict:
     """
@@ -72,55 +97,87 @@ def visualization_tool(input_str: str) -> dict:
     }
     """
     try:
-        data = json.loads(input_str)
-    except json.JSONDecodeError as e:
+        data = orjson.loads(input_str)
+    except orjson.JSONDecodeError as e:
         return {"error": f"Error decoding JSON input: {e}"}
 
-    nl_query = data.get("query")
-    sql_query = data.get("sql")
-    sql_results = data.get("data")
+    return recommend_visualization(data.get("query"), data.get("sql"), data.get("data"))
 
-    try:
-        recommender = VisualizationRecommender(nl_query, sql_query, sql_results)
-        recommendation = recommender.recommend_chart()
-        return recommendation
-    except Exception as e:
-        logger.exception(f"Visualization recommendation failed: {e}")
-        return {"error": str(e)}
 
 # ========================================
 # 🔁 SQL REGENERATION (FIXER)
 # ========================================
-@tool("regenerator_tool", return_direct=True)
-def regenerator_tool(input_str: str) -> str:
-    """Fix invalid SQL queries based on context and errors."""
-    try:
-        data = json.loads(input_str)
-    except json.JSONDecodeError as e:
-        return f"Error decoding JSON input: {e}"
-
-    nl_query = data.get("nl_query", "")
-    bad_sql = data.get("bad_sql", "")
-    errors = data.get("errors", "")
-    schema = data.get("schema")
+def regenerate_sql(
+    nl_query: str,
+    bad_sql: str,
+    errors: str,
+    schema: str | None = None,
+    candidates: int = 1,
+) -> str:
+    """Fix invalid SQL for in-process callers (no JSON round-trip)."""
+    from backend.regenerator.fixer import SQLRegenerator
 
-    regenerator = SQLRegenerator()
+    regenerator = SQLRegenerator(schema_cache=schema_cache)
 
     if schema is None:
         try:
-            schema_dict = schema_cache.get_schema()
+            schema = schema_cache.get_schema_text()
         except Exception as e:
-            logging.error(f"Failed to get schema for regeneration: {e}")
-            schema_dict = {}
-        schema_lines = [f"{table}: {', '.join(cols)}" for table, cols in schema_dict.items()]
-        schema = "\n".join(schema_lines)
+            logger.error("Failed to get schema for regeneration: %s", e)
+            schema = ""
+
+    return regenerator.regenerate(
+        nl_query, bad_sql, errors, schema, candidates=candidates
+    )
+
 
-    return regenerator.regenerate(nl_query, bad_sql, errors, schema)
+@tool("regenerator_tool", return_direct=True)
+def regenerator_tool(input_str: str) -> str:
+    """
+    Fix invalid SQL queries based on context and errors.
+    Input must be a JSON string with keys "nl_query", "bad_sql", "errors",
+    and optionally "schema" and "candidates" (fixes sampled in one LLM call).
+    """
+    try:
+        data = orjson.loads(input_str)
+    except orjson.JSONDecodeError as e:
+        return f"Error decoding JSON input: {e}"
+
+    return regenerate_sql(
+        data.get("nl_query", ""),
+        data.get("bad_sql", ""),
+        data.get("errors", ""),
+        data.get("schema"),
+        candidates=int(data.get("candidates", 1)),
+    )
 
 
 # ========================================
 # 💬 ANSWER GENERATOR 
 # ========================================
+def answer_question(
+    nl_query: str,
+    sql_query: str,
+    sql_results: str,
+    shown_rows: int | None = None,
+    total_rows: int | None = None,
+    truncated: bool = False,
+) -> str:
+    """
+    Generate the natural language answer for in-process callers (no JSON round-trip).
+    sql_results may be a sample: shown_rows of total_rows (more when truncated).
+    """
+    try:
+        from backend.answer_generator.answer_generator import generate_answer
+
+        return generate_answer(
+            nl_query, sql_query, sql_results, shown_rows, total_rows, truncated
+        )
+    except Exception as e:
+        logger.exception("Error generating LLM answer: %s", e)
+        return f"Error generating natural language answer: {e}"
+
+
 @tool("answer_generator_tool", return_direct=True)
 def answer_generator_tool(input_str: str) -> str:
     """
@@ -132,21 +189,76 @@ def answer_generator_tool(input_str: str) -> str:
         "sql_results": "<SQL execution output>"
     }
     """
-    #logging.info(f"🧠 Generating answer from LLM. with input: {input_str}"  )
     try:
-        data = json.loads(input_str)
-    except json.JSONDecodeError as e:
+        data = orjson.loads(input_str)
+    except orjson.JSONDecodeError as e:
         return f"Error decoding JSON input: {e}"
 
-    nl_query = data.get("query", "")
-    sql_query = data.get("data", "")
     sql_results = data.get("sql_results", "")
-    #logging.info(f"🧠 Generating answer from LLM. with {nl_query}, {sql_query}, {sql_results}"  )
+    if not isinstance(sql_results, str):
+        sql_results = dumps_rows(sql_results)
+
+    return answer_question(
+        data.get("nl_query", ""), data.get("sql_query", ""), sql_results
+    )
 
+
+# ========================================
+# 🧾 ANSWER + VISUALIZATION (SINGLE CALL)
+# ========================================
+def summarize_and_visualize(
+    nl_query: str,
+    sql_query: str,
+    sql_results: str,
+    shown_rows: int | None = None,
+    total_rows: int | None = None,
+    truncated: bool = False,
+) -> dict:
+    """
+    Answer + visualization in one LLM call for in-process callers.
+    sql_results may be a sample: shown_rows of total_rows (more when truncated).
+    Returns { "error": "<message>" } if the combined response could not be used.
+    """
     try:
-        response = generate_answer(nl_query, sql_query, sql_results)
-        return response
+        from backend.answer_generator.answer_generator import (
+            generate_answer_and_visualization,
+        )
 
+        return generate_answer_and_visualization(
+            nl_query, sql_query, sql_results, shown_rows, total_rows, truncated
+        )
     except Exception as e:
-        logger.exception(f"Error generating LLM answer: {e}")
-        return f"Error generating natural language answer: {e}"
+        logger.warning("Combined answer/visualization generation failed: %s", e)
+        return {"error": str(e)}
+
+
+@tool("summary_and_viz_tool", return_direct=True)
+def summary_and_viz_tool(input_str: str) -> dict:
+    """
+    Generate the natural language answer and the visualization
+    recommendation with a single LLM call.
+    Input (JSON string):
+    {
+        "query": "<user question>",
+        "sql": "<generated SQL>",
+        "data": [ { "col1": ..., "col2": ... }, ... ]
+    }
+
+    Output:
+    {
+        "answer": "<answer text>",
+        "visualization": {
+            "type": ..., "x_axis": ..., "y_axis": ..., "title": ..., "reason": ...
+        }
+    }
+    or { "error": "<message>" } if the combined response could not be used.
+    """
+    try:
+        data = orjson.loads(input_str)
+    except orjson.JSONDecodeError as e:
+        return {"error": f"Error decoding JSON input: {e}"}
+
+    sql_results = dumps_rows(data.get("data", []))
+    return summarize_and_visualize(
+        data.get("query", ""), data.get("sql", ""), sql_results
+    )
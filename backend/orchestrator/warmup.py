@@ -0,0 +1,47 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Kept import-light: the heavy backends are imported by the warm-up threads
+
+logger = logging.getLogger(__name__)
+
+_started = False
+_started_lock = threading.Lock()
+
+
+def _preload_schema() -> None:
+    # Loading from the database also leaves a warm connection in the pool
+    try:
+        from backend.sql_executor.schema_cache import get_schema_cache
+
+        get_schema_cache().load_schema()
+    except Exception as e:
+        logger.error("Failed to preload schema: %s", e)
+
+
+def _preload_llm() -> None:
+    try:
+        from backend.services.openai_client import OpenAIClient
+
+        OpenAIClient()
+    except Exception as e:
+        logger.error("Failed to preload LLM client: %s", e)
+
+
+def start_warmup() -> None:
+    """
+    Load the schema and build the LLM client in background threads, once per
+    process, so the first request does not pay for them. Returns immediately;
+    callers that need either before warm-up ends wait for the same load.
+    """
+    global _started
+    with _started_lock:
+        if _started:
+            return
+        _started = True
+
+    warmup = ThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup")
+    warmup.submit(_preload_schema)
+    warmup.submit(_preload_llm)
+    warmup.shutdown(wait=False)
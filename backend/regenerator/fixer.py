@@ -1,6 +1,11 @@
-from backend.sql_executor.schema_cache import SchemaCache
-from backend.guardrails.validator import Guardrails
-from backend.orchestrator.chains import get_regeneration_chain
+from backend.sql_executor.schema_cache import SchemaCache, get_schema_cache
+from backend.guardrails.validator import Guardrails, get_guardrails
+from backend.orchestrator.chains import get_regeneration_chain, get_regeneration_prompt
+from backend.services.openai_client import OpenAIClient
+from backend.utils.cache import LRUCache, make_key, normalize_text
+
+# Fixed SQL keyed by (normalized NL query, bad SQL, errors, schema, candidates)
+_REGEN_CACHE = LRUCache(maxsize=1024)
 
 class SQLRegenerator:
     """
@@ -9,38 +14,62 @@ class SQLRegenerator:
     """
 
     def __init__(self, guard: Guardrails | None = None, schema_cache: SchemaCache | None = None):
-        self.guard = guard or Guardrails()
-        self.schema_cache = schema_cache or SchemaCache()
-        # Preload schema to guide regeneration
-        self.schema_cache.load_schema()
+        self.guard = guard or get_guardrails()
+        # Shared, already-loaded cache; get_schema() loads lazily if needed
+        self.schema_cache = schema_cache or get_schema_cache()
 
     def regenerate(
         self,
         nl_query: str,
         bad_sql: str,
         errors: str,
-        schema: str | None = None
+        schema: str | None = None,
+        candidates: int = 1,
     ) -> str:
         """
         Regenerate/fix SQL query using LangChain.
         If schema is not provided, use cached schema.
+        With candidates > 1, a single LLM call samples that many fixes and
+        the first one passing guardrails is returned (the first one otherwise).
+        Only fixes that pass guardrails are cached.
         """
-        chain = get_regeneration_chain()
-
-        # Build schema string for prompt
+        # Schema string for prompt, rendered once per schema load
         if schema is None:
-            schema_dict = self.schema_cache.get_schema()
-            schema_lines = []
-            for table, cols in schema_dict.items():
-                schema_lines.append(f"{table}: {', '.join(cols)}")
-            schema = "\n".join(schema_lines)
+            schema = self.schema_cache.get_schema_text()
+
+        cache_key = make_key(
+            normalize_text(nl_query), bad_sql.strip(), errors, schema, str(candidates)
+        )
+        cached_sql = _REGEN_CACHE.get(cache_key)
+        if cached_sql is not None:
+            return cached_sql
 
-        return chain.invoke({
+        sql = self._regenerate(nl_query, bad_sql, errors, schema, candidates)
+        if self.guard.validate(sql)["ok"]:
+            _REGEN_CACHE.set(cache_key, sql)
+        return sql
+
+    def _regenerate(
+        self, nl_query: str, bad_sql: str, errors: str, schema: str, candidates: int
+    ) -> str:
+        """Ask the LLM for a fix (one or several sampled candidates)."""
+        inputs = {
             "nl_query": nl_query,
             "bad_sql": bad_sql,
             "errors": errors,
             "schema": schema
-        })
+        }
+        if candidates <= 1:
+            return get_regeneration_chain().invoke(inputs)
+
+        # One request, n sampled completions; validate them locally
+        messages = get_regeneration_prompt().format_messages(**inputs)
+        result = OpenAIClient().get_llm().generate([messages], n=candidates)
+        options = [g.text.strip() for g in result.generations[0] if g.text.strip()]
+        for sql in options:
+            if self.guard.validate(sql)["ok"]:
+                return sql
+        return options[0] if options else bad_sql
 
     def validate_and_regenerate(self, nl_query: str, bad_sql: str, errors: str) -> str:
         """
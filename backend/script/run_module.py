@@ -6,17 +6,14 @@ repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 if repo_root not in sys.path:
     sys.path.insert(0, repo_root)
 
-from backend.sql_executor.executor import  SQLExecutor 
-from backend.guardrails.validator import Guardrails
-from backend.regenerator.fixer import SQLRegenerator
-from backend.sql_executor.schema_cache import SchemaCache
-from backend.models.settings import settings
+# Module imports are deferred to the function that needs them
 from dotenv import load_dotenv
-import pyodbc
 
 load_dotenv()  # Load environment variables from .env file
 
 def run_sql_executor():
+    from backend.sql_executor.executor import SQLExecutor
+
     sql = input("Enter SQL to execute: ")
     executor = SQLExecutor()
     result = executor.run_query(sql)
@@ -28,18 +25,20 @@ def run_sql_executor():
     print(f"Execution time: {result['execution_time']:.2f}s\n")
 
 def run_schema_cache():
+    from backend.sql_executor.schema_cache import SchemaCache
+
     cache = SchemaCache()
     try:
         cache.load_schema()
-        schema = cache.get_schema()
         print("\nCached Schema:")
-        for table, columns in schema.items():
-            print(f"{table}: {', '.join(columns)}")
+        print(cache.get_schema_text())
         print()
     except RuntimeError as e:
         print(f"Error loading schema: {e}\n")
 
 def run_guardrails():
+    from backend.guardrails.validator import Guardrails
+
     sql = input("Enter SQL to validate: ")
     guard = Guardrails()
     result = guard.validate(sql)
@@ -48,6 +47,8 @@ def run_guardrails():
 
 
 def run_regenerator():
+    from backend.regenerator.fixer import SQLRegenerator
+
     nl_query = input("Enter natural language query: ")
     bad_sql = input("Enter bad SQL: ")
     errors = input("Enter validation errors: ")
@@ -58,6 +59,10 @@ def run_regenerator():
     print(fixed_sql, "\n")
 
 def test_connection():
+    import pyodbc
+    from backend.models.settings import get_settings
+
+    settings = get_settings()
     print("Using connection string from .env:")
     print(settings.sql_connection_string)
     try:
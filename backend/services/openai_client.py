@@ -1,34 +1,140 @@
 from langchain_openai import AzureChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from backend.models.settings import settings
+from langchain_core.messages import BaseMessage
+from backend.models.settings import get_settings
 from backend.utils.logger import log_with_task
+from backend.utils.cache import LRUCache, make_key
 import logging
+import orjson
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
 PROJECT_TASK = "SQL-Agent"
+
+# LLM responses keyed by a digest of (deployment, prompt)
+_RESPONSE_CACHE = LRUCache(maxsize=1024)
+# Calls currently waiting on the LLM, by the same key; identical concurrent
+# prompts share one request instead of each paying a round-trip
+_IN_FLIGHT: dict[bytes, Future] = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+
+def invoke_cached(llm, prompt: str):
+    """
+    Invoke the LLM with a plain prompt, reusing the previous response
+    when the exact same prompt was already sent to the same deployment,
+    or joining the request when that prompt is still in flight.
+    """
+    key = make_key(getattr(llm, "deployment_name", None) or "", prompt)
+    response = _RESPONSE_CACHE.get(key)
+    if response is not None:
+        return response
+
+    with _IN_FLIGHT_LOCK:
+        pending = _IN_FLIGHT.get(key)
+        if pending is None:
+            future = _IN_FLIGHT[key] = Future()
+    if pending is not None:
+        return pending.result()
+
+    try:
+        response = llm.invoke(prompt)
+        _RESPONSE_CACHE.set(key, response)
+        future.set_result(response)
+        return response
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _IN_FLIGHT_LOCK:
+            _IN_FLIGHT.pop(key, None)
+
+
+def forget_cached(llm, prompt: str) -> None:
+    """Drop a cached response, e.g. one the caller could not parse."""
+    _RESPONSE_CACHE.pop(make_key(getattr(llm, "deployment_name", None) or "", prompt))
+
+
+def response_text(response) -> str:
+    """
+    Return the text of an LLM response without falling back to the
+    (expensive) repr of the whole message object.
+    """
+    if isinstance(response, BaseMessage):
+        content = response.content
+        return content if isinstance(content, str) else orjson.dumps(content).decode()
+    if isinstance(response, str):
+        return response
+    return orjson.dumps(response, default=str).decode()
+
+
+@lru_cache(maxsize=1)
+def _http_clients():
+    """
+    Process-wide HTTP clients shared by every deployment, so all LLM calls
+    reuse the same keep-alive connection pool to Azure OpenAI.
+    """
+    import httpx
+
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    return httpx.Client(limits=limits), httpx.AsyncClient(limits=limits)
+
+
 class OpenAIClient:
     """Wrapper around Azure OpenAI (via LangChain)."""
 
+    # One initialized client per deployment, reused by every caller
+    _instances: dict = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, deployment_name: str | None = None):
+        key = deployment_name or get_settings().azure_openai_deployment
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super().__new__(cls)
+                instance._initialized = False
+                instance._init_lock = threading.Lock()
+                cls._instances[key] = instance
+        return instance
+
     def __init__(self, deployment_name: str | None = None):
+        if self._initialized:
+            return
+        # Concurrent first uses (e.g. warm-up and a request) build the client once
+        with self._init_lock:
+            if not self._initialized:
+                self._setup(deployment_name)
+
+    def _setup(self, deployment_name: str | None) -> None:
+        settings = get_settings()
         self.deployment_name =deployment_name or settings.azure_openai_deployment
         self.api_version = settings.azure_openai_api_version
         self.endpoint =settings.azure_openai_endpoint
         self.api_key = settings.azure_openai_api_key
         #self.temperature = temperature
-        log_with_task(logging.INFO, f"Azure OpenAI Config", task="OpenAI-Init")
-        log_with_task(logging.INFO, f"Endpoint: {self.endpoint}", task="OpenAI-Params")
-        log_with_task(logging.INFO, f"Deployment: {self.deployment_name}", task="OpenAI-Params")
-        log_with_task(logging.INFO, f"Version: {self.api_version}", task="OpenAI-Params")
+        log_with_task(logging.INFO, "Azure OpenAI Config", task="OpenAI-Init")
+        log_with_task(logging.INFO, "Endpoint: %s", self.endpoint, task="OpenAI-Params")
+        log_with_task(
+            logging.INFO, "Deployment: %s", self.deployment_name, task="OpenAI-Params"
+        )
+        log_with_task(
+            logging.INFO, "Version: %s", self.api_version, task="OpenAI-Params"
+        )
         
         
         if not self.endpoint or not self.deployment_name:
             raise ValueError("Missing Azure OpenAI configuration.")
 
+        http_client, http_async_client = _http_clients()
         self.llm = AzureChatOpenAI(
             deployment_name=self.deployment_name,
             openai_api_version=self.api_version,
             azure_endpoint=self.endpoint,
+            http_client=http_client,
+            http_async_client=http_async_client,
             #temperature=self.temperature,
         )
+        self._initialized = True
 
     def get_llm(self):
         """Return the raw LangChain LLM instance."""
@@ -36,12 +142,6 @@ class OpenAIClient:
 
     def run_prompt(self, system_prompt: str, user_prompt: str) -> str:
         """Run a simple system + user prompt and return plain text output."""
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", system_prompt),
-                ("user", f"{user_prompt}"),
-            ]
-        )
-
-        chain = prompt | self.llm | StrOutputParser()
-        return chain.invoke({"user_prompt": user_prompt})
+        # Plain messages: no per-call template parsing (and no brace escaping)
+        response = self.llm.invoke([("system", system_prompt), ("user", user_prompt)])
+        return response_text(response)
@@ -1,37 +1,216 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 import pyodbc
 import datetime
-from backend.models.settings import settings
+from backend.models.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# ODBC driver-manager pooling; must be set before the first connection is made
+pyodbc.pooling = True
+
+# Live connections allowed per connection string (idle + in use)
+MAX_POOL_SIZE = 20
+# Seconds to wait for a free connection when the pool is exhausted
+ACQUIRE_TIMEOUT = 30
+_POOLS: dict[str, "_ConnectionPool"] = {}
+_POOLS_LOCK = threading.Lock()
+# Dedicated threads for blocking pyodbc calls from async callers, one per
+# pooled connection, so queries never queue behind LLM calls in the default executor
+_DB_THREADS = ThreadPoolExecutor(max_workers=MAX_POOL_SIZE, thread_name_prefix="sql")
+
+# Rows pulled from the driver per round-trip
+FETCH_BATCH_SIZE = 1000
+# Column types returned as ISO strings
+_TEMPORAL_TYPES = (datetime.datetime, datetime.date)
+# SQLSTATE class of connection failures (e.g. a link Azure SQL dropped while
+# idle). Other errors, including timeouts (HYT00) and bad SQL, leave the
+# connection fit for reuse and are not retried
+_CONNECTION_FAILURE_CLASS = "08"
+
+
+def _is_dead_connection(error: pyodbc.Error) -> bool:
+    """True if a driver error reports a connection failure (SQLSTATE 08xxx)."""
+    return bool(error.args) and str(error.args[0]).startswith(_CONNECTION_FAILURE_CLASS)
+
+
+class _ConnectionPool:
+    """Bounded pool of live connections for one connection string."""
+
+    def __init__(self, conn_str: str, max_size: int = MAX_POOL_SIZE):
+        self.conn_str = conn_str
+        # LIFO so the most recently used (warmest) connection is reused first
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def acquire(
+        self, timeout: float = ACQUIRE_TIMEOUT, fresh: bool = False
+    ) -> pyodbc.Connection:
+        """
+        Reuse an idle connection, or open a new one while under max_size.
+        With fresh=True a new connection is always opened.
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No SQL connection available after {timeout}s.")
+        if not fresh:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+        try:
+            return pyodbc.connect(self.conn_str, autocommit=True)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: pyodbc.Connection, discard: bool = False) -> None:
+        """Return a connection to the pool, or close it if it may be broken."""
+        try:
+            if discard:
+                try:
+                    conn.close()
+                except pyodbc.Error:
+                    pass
+            else:
+                self._idle.put_nowait(conn)
+        finally:
+            self._slots.release()
+
+
+@lru_cache(maxsize=256)
+def _row_builder(columns: tuple, temporal: tuple):
+    """
+    Compile a row -> dict function for one result layout: a single dict
+    literal per row instead of zip() plus a per-value conversion loop.
+    Temporal column indices are converted to ISO strings.
+    """
+    fields = ", ".join(
+        f"{name!r}: (r[{i}].isoformat() if r[{i}] is not None else None)"
+        if i in temporal
+        else f"{name!r}: r[{i}]"
+        for i, name in enumerate(columns)
+    )
+    namespace: dict = {}
+    exec(f"def build_row(r):\n    return {{{fields}}}", namespace)
+    return namespace["build_row"]
+
+
+def _get_pool(conn_str: str) -> _ConnectionPool:
+    """Return the shared connection pool for a connection string."""
+    with _POOLS_LOCK:
+        pool = _POOLS.get(conn_str)
+        if pool is None:
+            pool = _POOLS[conn_str] = _ConnectionPool(conn_str)
+        return pool
+
 
 class SQLExecutor:
     """Executes SQL queries against Azure SQL Database."""
 
     def __init__(self):
+        settings = get_settings()
         self.conn_str = settings.sql_connection_string
+        # Rows returned per query; fetching stops (and the query is cancelled) beyond it
+        self.max_rows = settings.sql_max_rows
+        self._pool = _get_pool(self.conn_str)
+
+    @contextmanager
+    def connection(self, fresh: bool = False):
+        """
+        Borrow a pooled connection (a newly opened one with fresh=True).
+        It is discarded instead of reused if the block raises a connection
+        failure or is interrupted; ordinary errors such as bad SQL keep it.
+        """
+        conn = self._pool.acquire(fresh=fresh)
+        try:
+            yield conn
+        except pyodbc.Error as e:
+            self._pool.release(conn, discard=_is_dead_connection(e))
+            raise
+        except Exception:
+            self._pool.release(conn)
+            raise
+        except BaseException:
+            self._pool.release(conn, discard=True)
+            raise
+        self._pool.release(conn)
+
+    def _with_connection(self, work):
+        """
+        Call work(conn) on a pooled connection. If that connection turns out
+        to be dead, retry once on a freshly opened one.
+        """
+        try:
+            with self.connection() as conn:
+                return work(conn)
+        except pyodbc.Error as e:
+            if not _is_dead_connection(e):
+                raise
+            logger.warning(
+                "Pooled SQL connection failed (%s); retrying on a new one", e
+            )
+        with self.connection(fresh=True) as conn:
+            return work(conn)
 
     def run_query(self, sql: str) -> dict:
         """Run a SQL query and return rows as list of dicts with JSON-serializable values."""
         try:
-            with pyodbc.connect(self.conn_str) as conn:
-                cursor = conn.cursor()
-                cursor.execute(sql)
-                columns = [column[0] for column in cursor.description]
-                rows = cursor.fetchall()
-
-                result = []
-                for row in rows:
-                    row_dict = {}
-                    for col, val in zip(columns, row):
-                        # Convert datetime/date to ISO string
-                        if isinstance(val, (datetime.datetime, datetime.date)):
-                            row_dict[col] = val.isoformat()
-                        else:
-                            row_dict[col] = val
-                    result.append(row_dict)
-
-                return {
-                    "rows": result,
-                    "row_count": len(result),
-                }
-
+            return self._with_connection(
+                lambda conn: self._execute(conn, sql, self.max_rows)
+            )
         except Exception as e:
             raise RuntimeError(f"SQL execution failed: {e}") from e
+
+    @staticmethod
+    def _execute(conn: pyodbc.Connection, sql: str, max_rows: int) -> dict:
+        """
+        Execute one query on an open connection and build its result dict
+        (at most max_rows rows).
+        """
+        cursor = conn.cursor()
+        cursor.arraysize = FETCH_BATCH_SIZE
+        truncated = False
+        try:
+            cursor.execute(sql)
+            columns = tuple(column[0] for column in cursor.description)
+            # Columns to convert to ISO strings, decided once from the driver types
+            temporal = tuple(
+                i for i, column in enumerate(cursor.description)
+                if column[1] in _TEMPORAL_TYPES
+            )
+            build_row = _row_builder(columns, temporal)
+
+            # Build dicts batch by batch instead of holding all raw rows too
+            result = []
+            while rows := cursor.fetchmany(
+                min(FETCH_BATCH_SIZE, max_rows - len(result) + 1)
+            ):
+                if len(result) + len(rows) > max_rows:
+                    # One row past the limit tells us the result was cut off
+                    rows = rows[: max_rows - len(result)]
+                    truncated = True
+                result.extend(map(build_row, rows))
+                if truncated:
+                    # Stop the server from producing the rest of the result
+                    cursor.cancel()
+                    break
+        finally:
+            cursor.close()
+
+        return {
+            "rows": result,
+            "row_count": len(result),
+            "truncated": truncated,
+        }
+
+    async def arun_query(self, sql: str) -> dict:
+        """
+        Async variant of run_query; the blocking driver calls run on the DB threads.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_DB_THREADS, self.run_query, sql)
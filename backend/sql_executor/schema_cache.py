@@ -1,8 +1,12 @@
-from typing import Dict, List
-import pyodbc
-import json
+from types import MappingProxyType
+from typing import Dict, List, Mapping
+import logging
 import os
-from backend.models.settings import settings
+import orjson
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 class SchemaCache:
     """
@@ -10,61 +14,95 @@ class SchemaCache:
     """
 
     CACHE_FILE = "schema_cache.json"
+    # Seconds a loaded schema is considered fresh; refreshed in the background
+    # once REFRESH_AHEAD of the TTL has elapsed, while the old one keeps serving
+    SCHEMA_TTL = 600
+    REFRESH_AHEAD = 0.8
 
     def __init__(self):
         # Structure: { "schema.table": {"columns": [...], "description": "..." } }
-        self.cache: Dict[str, Dict] = {}
-
-    def _connect(self):
-        """Create a new SQL connection."""
-        try:
-            conn = pyodbc.connect(settings.sql_connection_string)
-            print("[OK] Connected to Azure SQL Database.")
-            return conn
-        except Exception as e:
-            msg = (
-                f"[ERROR] Could not connect to Azure SQL: {e}\n"
-                "Check connection string, ODBC driver, and network/firewall settings."
-            )
-            raise ConnectionError(msg) from e
+        # Published as a read-only snapshot: a reload builds a new dict and swaps
+        # it in with one attribute store, so readers never need a lock
+        self.cache: Mapping[str, Dict] = MappingProxyType({})
+        # Prompt-ready renderings of self.cache, rebuilt after each load
+        self._schema_text: str | None = None
+        self._schema_context: str | None = None
+        # Bumped only when a load changes the schema, so callers can key
+        # derived caches cheaply
+        self.schema_version = 0
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._refresh_lock = threading.Lock()
+        # Serializes loads, so a request arriving during warm-up waits for it
+        # instead of loading the schema a second time
+        self._load_lock = threading.Lock()
+
+    def _set_cache(self, schema: Dict[str, Dict], loaded_at: float) -> None:
+        """
+        Swap in a newly loaded schema and drop renderings of the old one.
+        A reload that found the same schema only renews its load time.
+        """
+        if schema != self.cache:
+            self.cache = MappingProxyType(schema)
+            self._schema_text = self._schema_context = None
+            self.schema_version += 1
+        self._loaded_at = loaded_at
 
-    def load_schema(self, force_reload: bool = False) -> Dict[str, Dict]:
+    def load_schema(self, force_reload: bool = False) -> Mapping[str, Dict]:
         """
         Load schema from database or JSON cache.
         Stores fully qualified table names and optional table descriptions.
+        The database is read over a connection borrowed from the SQLExecutor
+        pool, so it is reused for the queries that follow.
         """
         if self.cache and not force_reload:
             return self.cache
 
+        with self._load_lock:
+            if self.cache and not force_reload:
+                return self.cache
+            return self._load(force_reload)
+
+    def _load(self, force_reload: bool) -> Mapping[str, Dict]:
+        """
+        Load under _load_lock: JSON cache file first (unless forced),
+        then the database.
+        """
         # Load from JSON cache if exists
         if not force_reload and os.path.exists(self.CACHE_FILE):
             try:
-                with open(self.CACHE_FILE, "r", encoding="utf-8") as f:
-                    self.cache = json.load(f)
-                print(f"[OK] Loaded schema from cache file ({self.CACHE_FILE})")
+                with open(self.CACHE_FILE, "rb") as f:
+                    schema = orjson.loads(f.read())
+                # Age the file contents by its mtime, so a stale file is refreshed soon
+                self._set_cache(schema, os.path.getmtime(self.CACHE_FILE))
+                logger.info("Loaded schema from cache file (%s)", self.CACHE_FILE)
                 return self.cache
             except Exception as e:
-                print(f"[ERROR] Failed to load JSON cache: {e}")
+                logger.error("Failed to load JSON cache: %s", e)
 
         # Fetch from database
+        # Catalog views directly (INFORMATION_SCHEMA.COLUMNS adds per-row
+        # permission filtering); user tables and views, as before
         query = """
-        SELECT 
-            TABLE_SCHEMA,
-            TABLE_NAME,
-            COLUMN_NAME,
+        SELECT
+            s.name AS TABLE_SCHEMA,
+            o.name AS TABLE_NAME,
+            c.name AS COLUMN_NAME,
             CAST(ISNULL(ep.value, '') AS NVARCHAR(MAX)) AS TABLE_DESCRIPTION
-        FROM INFORMATION_SCHEMA.COLUMNS c
-        LEFT JOIN sys.tables t ON t.name = c.TABLE_NAME
+        FROM sys.columns c
+        JOIN sys.objects o ON o.object_id = c.object_id AND o.type IN ('U', 'V')
+        JOIN sys.schemas s ON s.schema_id = o.schema_id
         LEFT JOIN sys.extended_properties ep
-            ON ep.major_id = t.object_id AND ep.minor_id = 0 AND ep.name = 'MS_Description'
-        ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION
+            ON ep.major_id = o.object_id AND ep.minor_id = 0 AND ep.class = 1
+            AND ep.name = 'MS_Description'
+        ORDER BY s.name, o.name, c.column_id
         """
 
         try:
-            with self._connect() as conn:
-                cursor = conn.cursor()
-                cursor.execute(query)
-                rows = cursor.fetchall()
+            from backend.sql_executor.executor import SQLExecutor
+
+            with SQLExecutor().connection() as conn:
+                rows = self._fetch_rows(conn, query)
         except Exception as e:
             raise RuntimeError(f"[ERROR] Failed to load schema from database: {e}") from e
 
@@ -76,23 +114,95 @@ class SchemaCache:
                 schema[fq_table] = {"columns": [], "description": table_desc or "No description available."}
             schema[fq_table]["columns"].append(column_name)
 
-        self.cache = schema
+        self._set_cache(schema, time.time())
 
         # Save to JSON
         try:
-            with open(self.CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump(schema, f, indent=2, ensure_ascii=False)
-            print(f"[OK] Schema cached to {self.CACHE_FILE}")
+            # Write then rename, so readers never see a half-written file
+            tmp_file = f"{self.CACHE_FILE}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(orjson.dumps(schema))
+            os.replace(tmp_file, self.CACHE_FILE)
+            logger.info("Schema cached to %s", self.CACHE_FILE)
         except Exception as e:
-            print(f"[ERROR] Failed to write schema cache file: {e}")
+            logger.error("Failed to write schema cache file: %s", e)
 
-        print(f"[OK] Loaded schema: {len(schema)} tables")
-        return schema
+        logger.info("Loaded schema: %d tables", len(schema))
+        return self.cache
 
-    def get_schema(self) -> Dict[str, Dict]:
-        if not self.cache:
+    @staticmethod
+    def _fetch_rows(conn, query: str) -> list:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def get_schema(self) -> Mapping[str, Dict]:
+        """
+        Return the cached schema, loading it (blocking) only if nothing is cached yet.
+        Near expiry a background reload is started and the current schema is served.
+        """
+        schema = self.cache
+        if not schema:
             return self.load_schema()
-        return self.cache
+        if time.time() - self._loaded_at > self.REFRESH_AHEAD * self.SCHEMA_TTL:
+            self._start_background_refresh()
+        return schema
+
+    def _start_background_refresh(self) -> None:
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._reload_background, name="schema-refresh", daemon=True
+        ).start()
+
+    def _reload_background(self) -> None:
+        try:
+            self.load_schema(force_reload=True)
+        except Exception as e:
+            # Keep serving the current schema; retry after another TTL period
+            self._loaded_at = time.time()
+            logger.error("Background schema refresh failed: %s", e)
+        finally:
+            self._refreshing = False
+
+    def get_schema_text(self) -> str:
+        """
+        Return the schema as "schema.table: col1, col2" lines, built once per load.
+        """
+        schema = self.get_schema()
+        text = self._schema_text
+        if text is None:
+            text = "\n".join(
+                f"{table}: {', '.join(info.get('columns', []))}"
+                for table, info in schema.items()
+            )
+            # Only memoize if no refresh swapped the schema meanwhile
+            if schema is self.cache:
+                self._schema_text = text
+        return text
+
+    def get_schema_context(self) -> str:
+        """
+        Return tables with descriptions and columns for SQL generation prompts,
+        built once per load.
+        """
+        schema = self.get_schema()
+        context = self._schema_context
+        if context is None:
+            context = "\n".join(
+                f"Table: {table}\n"
+                f"Description: {info.get('description', 'No description available.')}\n"
+                f"Columns: {', '.join(info.get('columns', []))}\n"
+                for table, info in schema.items()
+            )
+            if schema is self.cache:
+                self._schema_context = context
+        return context
 
     def get_tables(self) -> List[str]:
         return list(self.cache.keys())
@@ -102,3 +212,14 @@ class SchemaCache:
 
     def get_table_description(self, fq_table_name: str) -> str:
         return self.cache.get(fq_table_name, {}).get("description", "No description available.")
+
+
+_shared_cache: SchemaCache | None = None
+
+
+def get_schema_cache() -> SchemaCache:
+    """Return the process-wide SchemaCache, creating it on first use."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = SchemaCache()
+    return _shared_cache
@@ -1,7 +1,6 @@
-import json
 import logging
-from backend.sql_executor.schema_cache import SchemaCache
-from backend.services.openai_client import OpenAIClient
+from backend.sql_executor.schema_cache import get_schema_cache
+from backend.services.openai_client import OpenAIClient, invoke_cached
 
 
 class SQLGenerator:
@@ -12,19 +11,13 @@ class SQLGenerator:
 
     def __init__(self):
         self.llm = OpenAIClient().get_llm()
-        self.schema_cache = SchemaCache()
+        self.schema_cache = get_schema_cache()
 
     def _build_schema_context(self) -> str:
         """
         Build a text context of all tables and columns for LLM prompt.
         """
-        schema_dict = self.schema_cache.get_schema()
-        context_lines = []
-        for table_name, info in schema_dict.items():
-            description = info.get("description", "No description available.")
-            columns = ", ".join(info.get("columns", []))
-            context_lines.append(f"Table: {table_name}\nDescription: {description}\nColumns: {columns}\n")
-        return "\n".join(context_lines)
+        return self.schema_cache.get_schema_context()
 
 
     def generate(self, nl_query: str) -> str:
@@ -54,19 +47,22 @@ class SQLGenerator:
             """
 
             logging.info("🧠 Generating SQL for NL query: %s", nl_query)
-            response = self.llm.invoke(prompt)
+            # Cached per prompt, so a changed schema context is a cache miss
+            response = invoke_cached(self.llm, prompt)
 
             # Handle response variations depending on LLM API
             if isinstance(response, dict) and "content" in response:
-                return response["content"].strip()
+                sql = response["content"].strip()
             elif hasattr(response, "content"):
-                return response.content.strip()
+                sql = response.content.strip()
             elif isinstance(response, str):
-                return response.strip()
+                sql = response.strip()
             else:
                 logging.warning(" Unexpected LLM response type: %s", type(response))
                 return str(response)
 
+            return sql
+
         except Exception as e:
-            logging.exception(f"SQL generation failed: {e}")
+            logging.exception("SQL generation failed: %s", e)
             return f"Error generating SQL: {str(e)}"
@@ -0,0 +1,98 @@
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from backend.answer_generator import answer_generator  # noqa: E402
+from backend.answer_generator.answer_generator import (  # noqa: E402
+    _normalize_visualization,
+    _result_columns,
+    generate_answer_and_visualization,
+)
+from backend.services import openai_client  # noqa: E402
+
+ROWS = '[{"region": "EU", "month": "2024-01", "total": 10}]'
+
+
+class FakeLLM:
+    deployment_name = "test-deployment"
+
+    def __init__(self, *replies):
+        self._replies = list(replies)
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return self._replies.pop(0)
+
+
+@pytest.fixture
+def use_llm(monkeypatch):
+    monkeypatch.setattr(openai_client, "_RESPONSE_CACHE", openai_client.LRUCache())
+
+    def use(llm):
+        client = type("FakeClient", (), {"get_llm": lambda self: llm})
+        monkeypatch.setattr(answer_generator, "OpenAIClient", client)
+        return llm
+
+    return use
+
+
+def test_result_columns_reads_the_first_row():
+    assert _result_columns(ROWS) == ["region", "month", "total"]
+    assert _result_columns("[]") == []
+    assert _result_columns("not json") == []
+
+
+def test_valid_recommendation_is_kept():
+    viz = {
+        "type": "line",
+        "x_axis": "month",
+        "y_axis": "total",
+        "title": "Sales by month",
+        "reason": "Trend over time",
+    }
+    assert _normalize_visualization(viz, ["region", "month", "total"]) == viz
+
+
+def test_unknown_type_and_columns_fall_back():
+    viz = _normalize_visualization(
+        {"type": "radar", "x_axis": "country", "y_axis": "revenue"},
+        ["region", "month", "total"],
+    )
+    assert viz == {
+        "type": "table",
+        "x_axis": "region",
+        "y_axis": "total",
+        "title": "Recommended Visualization",
+        "reason": "Based on heuristic and query context",
+    }
+
+
+def test_single_column_has_no_y_axis():
+    viz = _normalize_visualization({"type": "bar"}, ["total"])
+    assert (viz["x_axis"], viz["y_axis"]) == ("total", None)
+    assert _normalize_visualization({"type": "bar"}, [])["x_axis"] is None
+
+
+def test_fenced_json_reply_is_parsed(use_llm):
+    use_llm(
+        FakeLLM(
+            '```json\n{"answer": "EU sold 10.", "visualization": '
+            '{"type": "bar", "x_axis": "region", "y_axis": "total"}}\n```'
+        )
+    )
+
+    result = generate_answer_and_visualization("q", "SELECT 1", ROWS)
+
+    assert result["answer"] == "EU sold 10."
+    assert result["visualization"]["type"] == "bar"
+    assert result["visualization"]["x_axis"] == "region"
+
+
+def test_malformed_reply_is_not_cached(use_llm):
+    llm = use_llm(FakeLLM('{"answer": "no chart"}', "still not json"))
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            generate_answer_and_visualization("q", "SELECT 1", ROWS)
+    assert llm.calls == 2
@@ -0,0 +1,33 @@
+from backend.utils.cache import LRUCache, make_key, normalize_text
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_pop_removes_an_entry():
+    cache = LRUCache()
+    cache.set("a", 1)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "missing") == "missing"
+    assert cache.get("a") is None
+
+
+def test_make_key_separates_parts():
+    assert make_key("ab", "c") != make_key("a", "bc")
+    assert make_key(None, "x") == make_key("", "x")
+
+
+def test_normalize_text_collapses_whitespace_but_keeps_case():
+    assert normalize_text("  Sales  by\n McDonald ") == "Sales by McDonald"
+    assert normalize_text(None) == ""
@@ -0,0 +1,179 @@
+import pytest
+
+pyodbc = pytest.importorskip("pyodbc")
+pytest.importorskip("pydantic_settings")
+
+from backend.sql_executor import executor  # noqa: E402
+from backend.sql_executor.executor import SQLExecutor, _ConnectionPool  # noqa: E402
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.description = [("id", int), ("name", str)]
+        self._rows = list(rows)
+        self.fetch_sizes = []
+        self.cancelled = False
+        self.closed = False
+        self.arraysize = 1
+
+    def execute(self, sql):
+        pass
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        return batch
+
+    def cancel(self):
+        self.cancelled = True
+
+    def close(self):
+        self.closed = True
+
+
+class CursorConnection(FakeConnection):
+    def __init__(self, cursor):
+        super().__init__()
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Connections opened through pyodbc.connect, in order."""
+    connections = []
+
+    def connect(conn_str, autocommit):
+        conn = FakeConnection()
+        connections.append(conn)
+        return conn
+
+    monkeypatch.setattr(executor.pyodbc, "connect", connect)
+    return connections
+
+
+def _executor(pool):
+    sql_executor = SQLExecutor.__new__(SQLExecutor)
+    sql_executor._pool = pool
+    sql_executor.max_rows = 10
+    return sql_executor
+
+
+def test_released_connection_is_reused(opened):
+    pool = _ConnectionPool("dsn", max_size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    assert len(opened) == 1
+
+
+def test_fresh_acquire_opens_a_new_connection(opened):
+    pool = _ConnectionPool("dsn", max_size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire(fresh=True) is not conn
+    assert len(opened) == 2
+
+
+def test_acquire_times_out_when_pool_is_exhausted(opened):
+    pool = _ConnectionPool("dsn", max_size=1)
+    pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.01)
+
+
+def test_failed_connect_frees_its_slot(monkeypatch):
+    def connect(conn_str, autocommit):
+        raise pyodbc.OperationalError("08001", "unreachable")
+
+    monkeypatch.setattr(executor.pyodbc, "connect", connect)
+    pool = _ConnectionPool("dsn", max_size=1)
+    for _ in range(2):
+        with pytest.raises(pyodbc.OperationalError):
+            pool.acquire(timeout=0.01)
+
+
+def test_connection_failure_discards_the_connection(opened):
+    sql_executor = _executor(_ConnectionPool("dsn", max_size=1))
+
+    with pytest.raises(pyodbc.Error):
+        with sql_executor.connection():
+            raise pyodbc.OperationalError("08S01", "link failure")
+
+    assert opened[0].closed
+    assert sql_executor._pool.acquire(timeout=0.01) is not opened[0]
+
+
+def test_query_error_keeps_the_connection(opened):
+    sql_executor = _executor(_ConnectionPool("dsn", max_size=1))
+
+    with pytest.raises(pyodbc.Error):
+        with sql_executor.connection():
+            raise pyodbc.ProgrammingError("42S02", "invalid object name")
+
+    assert not opened[0].closed
+    assert sql_executor._pool.acquire(timeout=0.01) is opened[0]
+
+
+def test_dead_connection_is_retried_once_on_a_fresh_one(opened):
+    sql_executor = _executor(_ConnectionPool("dsn", max_size=2))
+    used = []
+
+    def work(conn):
+        used.append(conn)
+        if len(used) == 1:
+            raise pyodbc.OperationalError("08S01", "link failure")
+        return "ok"
+
+    assert sql_executor._with_connection(work) == "ok"
+    assert used == opened
+    assert len(used) == 2
+
+
+def test_other_errors_are_not_retried(opened):
+    sql_executor = _executor(_ConnectionPool("dsn", max_size=2))
+    calls = []
+
+    def work(conn):
+        calls.append(conn)
+        raise pyodbc.ProgrammingError("42000", "syntax error")
+
+    with pytest.raises(pyodbc.ProgrammingError):
+        sql_executor._with_connection(work)
+    assert len(calls) == 1
+
+
+def test_execute_truncates_and_cancels_past_max_rows():
+    cursor = FakeCursor([(i, f"n{i}") for i in range(5)])
+
+    result = SQLExecutor._execute(CursorConnection(cursor), "SELECT 1", max_rows=3)
+
+    assert result["rows"] == [{"id": i, "name": f"n{i}"} for i in range(3)]
+    assert result["row_count"] == 3
+    assert result["truncated"] is True
+    # One row past the limit is fetched to detect the cut-off
+    assert cursor.fetch_sizes == [4]
+    assert cursor.cancelled and cursor.closed
+
+
+def test_execute_exactly_max_rows_is_not_truncated():
+    cursor = FakeCursor([(i, f"n{i}") for i in range(3)])
+
+    result = SQLExecutor._execute(CursorConnection(cursor), "SELECT 1", max_rows=3)
+
+    assert result["row_count"] == 3
+    assert result["truncated"] is False
+    assert not cursor.cancelled and cursor.closed
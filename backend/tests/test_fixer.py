@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from backend.guardrails.validator import Guardrails  # noqa: E402
+from backend.regenerator import fixer  # noqa: E402
+from backend.regenerator.fixer import SQLRegenerator  # noqa: E402
+
+
+class FakeLLM:
+    def __init__(self, *texts):
+        self.texts = texts
+        self.calls = []
+
+    def generate(self, batches, n):
+        self.calls.append(n)
+        generations = [SimpleNamespace(text=text) for text in self.texts]
+        return SimpleNamespace(generations=[generations])
+
+
+@pytest.fixture
+def regenerator(tmp_path, monkeypatch):
+    rules = tmp_path / "rules.yaml"
+    rules.write_text("allowed_tables:\n  - CUSTOMERS\n", encoding="utf-8")
+    monkeypatch.setattr(fixer, "_REGEN_CACHE", fixer.LRUCache())
+    prompt = SimpleNamespace(format_messages=lambda **inputs: [])
+    monkeypatch.setattr(fixer, "get_regeneration_prompt", lambda: prompt)
+    return SQLRegenerator(guard=Guardrails(str(rules)), schema_cache=object())
+
+
+def _use_llm(monkeypatch, llm):
+    client = SimpleNamespace(get_llm=lambda: llm)
+    monkeypatch.setattr(fixer, "OpenAIClient", lambda: client)
+    return llm
+
+
+def _regenerate(regenerator):
+    return regenerator.regenerate(
+        "all customers", "SELECT * FROM secret", "errors", "schema", candidates=3
+    )
+
+
+def test_first_candidate_passing_guardrails_wins(regenerator, monkeypatch):
+    llm = _use_llm(
+        monkeypatch,
+        FakeLLM(
+            "SELECT * FROM secret",
+            "  ",
+            "SELECT id FROM customers",
+            "SELECT name FROM customers",
+        ),
+    )
+
+    assert _regenerate(regenerator) == "SELECT id FROM customers"
+    assert llm.calls == [3]
+
+
+def test_valid_fix_is_cached(regenerator, monkeypatch):
+    llm = _use_llm(monkeypatch, FakeLLM("SELECT id FROM customers"))
+    _regenerate(regenerator)
+
+    assert _regenerate(regenerator) == "SELECT id FROM customers"
+    assert llm.calls == [3]
+
+
+def test_no_passing_candidate_returns_first_and_is_not_cached(
+    regenerator, monkeypatch
+):
+    llm = _use_llm(
+        monkeypatch, FakeLLM("SELECT * FROM secret", "SELECT * FROM other")
+    )
+
+    assert _regenerate(regenerator) == "SELECT * FROM secret"
+    _regenerate(regenerator)
+    assert llm.calls == [3, 3]
+
+
+def test_no_candidates_keeps_the_bad_sql(regenerator, monkeypatch):
+    _use_llm(monkeypatch, FakeLLM("", "  "))
+
+    assert _regenerate(regenerator) == "SELECT * FROM secret"
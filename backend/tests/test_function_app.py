@@ -0,0 +1,26 @@
+import pytest
+
+from backend.orchestrator import warmup
+
+pytest.importorskip("azure.functions")
+
+# Importing the function app starts the warm-up; these tests do not need it
+with pytest.MonkeyPatch.context() as patch:
+    patch.setattr(warmup, "_started", True)
+    from backend.azure_function.function_app import _accepts_gzip
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["gzip", "gzip, deflate, br", "br;q=1.0, GZIP;q=0.5", "*", "identity, *;q=0.1"],
+)
+def test_gzip_accepted(header):
+    assert _accepts_gzip(header)
+
+
+@pytest.mark.parametrize(
+    "header",
+    ["", "identity", "br, deflate", "gzip;q=0", "gzip;q=0.0, *", "*;q=0", "gzip;q=x"],
+)
+def test_gzip_refused(header):
+    assert not _accepts_gzip(header)
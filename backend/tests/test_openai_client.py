@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from backend.services import openai_client  # noqa: E402
+from backend.services.openai_client import forget_cached, invoke_cached  # noqa: E402
+
+
+class FakeLLM:
+    deployment_name = "test-deployment"
+
+    def __init__(self, release=None):
+        self.calls = 0
+        self.started = threading.Event()
+        self._release = release
+
+    def invoke(self, prompt):
+        self.calls += 1
+        self.started.set()
+        if self._release is not None:
+            self._release.wait(timeout=5)
+        return f"answer {self.calls}"
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(openai_client, "_RESPONSE_CACHE", openai_client.LRUCache())
+    monkeypatch.setattr(openai_client, "_IN_FLIGHT", {})
+
+
+def test_repeated_prompt_is_served_from_cache():
+    llm = FakeLLM()
+
+    assert invoke_cached(llm, "prompt") == "answer 1"
+    assert invoke_cached(llm, "prompt") == "answer 1"
+    assert llm.calls == 1
+
+
+def test_forget_cached_forces_a_new_call():
+    llm = FakeLLM()
+    invoke_cached(llm, "prompt")
+    forget_cached(llm, "prompt")
+
+    assert invoke_cached(llm, "prompt") == "answer 2"
+
+
+def test_concurrent_identical_prompts_share_one_call(monkeypatch):
+    waiting = threading.Event()
+
+    class WatchedFuture(Future):
+        def result(self, timeout=None):
+            waiting.set()
+            return super().result(timeout)
+
+    monkeypatch.setattr(openai_client, "Future", WatchedFuture)
+    release = threading.Event()
+    llm = FakeLLM(release)
+    results = []
+
+    def ask():
+        results.append(invoke_cached(llm, "prompt"))
+
+    threads = [threading.Thread(target=ask) for _ in range(2)]
+    threads[0].start()
+    assert llm.started.wait(timeout=5)
+    threads[1].start()
+    # Let the first call finish only once the second is waiting on it
+    assert waiting.wait(timeout=5)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == ["answer 1", "answer 1"]
+    assert llm.calls == 1
+
+
+def test_failed_call_is_not_cached():
+    class FailingLLM(FakeLLM):
+        def invoke(self, prompt):
+            self.calls += 1
+            raise RuntimeError("boom")
+
+    llm = FailingLLM()
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            invoke_cached(llm, "prompt")
+    assert llm.calls == 2
+    assert not openai_client._IN_FLIGHT
@@ -0,0 +1,36 @@
+import time
+
+from backend.sql_executor.schema_cache import SchemaCache
+
+
+def _schema():
+    return {"dbo.customers": {"columns": ["id", "name"], "description": "People"}}
+
+
+def test_reload_with_same_schema_keeps_version_and_renderings():
+    cache = SchemaCache()
+    # Fresh load times, so reading the schema starts no background refresh
+    cache._set_cache(_schema(), loaded_at=time.time())
+    text = cache.get_schema_text()
+    version = cache.schema_version
+
+    reloaded_at = time.time()
+    cache._set_cache(_schema(), loaded_at=reloaded_at)
+
+    assert cache.schema_version == version
+    assert cache._loaded_at == reloaded_at
+    assert cache._schema_text is text
+
+
+def test_changed_schema_bumps_version_and_rebuilds_renderings():
+    cache = SchemaCache()
+    cache._set_cache(_schema(), loaded_at=time.time())
+    version = cache.schema_version
+    cache.get_schema_text()
+
+    changed = _schema()
+    changed["dbo.customers"]["columns"].append("email")
+    cache._set_cache(changed, loaded_at=time.time())
+
+    assert cache.schema_version == version + 1
+    assert "email" in cache.get_schema_text()
@@ -0,0 +1,71 @@
+import pytest
+
+from backend.guardrails.validator import Guardrails
+
+
+@pytest.fixture
+def guard(tmp_path):
+    rules = tmp_path / "rules.yaml"
+    rules.write_text(
+        "blocked_keywords:\n  - DROP\n"
+        "allowed_tables:\n  - CUSTOMERS\n  - SALES\n",
+        encoding="utf-8",
+    )
+    return Guardrails(str(rules))
+
+
+@pytest.mark.parametrize("newline", ["\r", "\r\n", "\n"])
+def test_line_comment_ends_at_any_newline(guard, newline):
+    sql = f"SELECT * FROM customers -- x{newline}DROP TABLE customers"
+    result = guard.validate(sql)
+    assert result == {"ok": False, "errors": ["Blocked keyword detected: DROP"]}
+
+
+def test_blocked_keyword_inside_comment_is_ignored(guard):
+    assert guard.validate("SELECT * FROM customers -- DROP TABLE customers")["ok"]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT name FROM customers WHERE id = 1",
+        "SELECT c.name, s.total FROM dbo.customers c JOIN sales s ON s.cid = c.id",
+        "SELECT * FROM customers, sales",
+    ],
+)
+def test_allowed_tables_pass(guard, sql):
+    assert guard.validate(sql) == {"ok": True, "errors": []}
+
+
+@pytest.mark.parametrize("newline", ["\r", "\r\n", "\n"])
+def test_table_after_line_comment_is_checked(guard, newline):
+    sql = f"SELECT * FROM customers c -- x{newline}JOIN secret s ON 1=1"
+    result = guard.validate(sql)
+    assert not result["ok"]
+    assert "SECRET" in result["errors"][0].upper()
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM customers c WITH (NOLOCK), secret s",
+        "SELECT * FROM customers . secret",
+        "SELECT * FROM sales..creditcard",
+        "SELECT * FROM customers c JOIN customers..secret s ON 1=1",
+    ],
+)
+def test_disguised_tables_are_rejected(guard, sql):
+    assert not guard.validate(sql)["ok"]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM customers TABLESAMPLE (10 PERCENT), secret s",
+        "SELECT * FROM customers . secret",
+        "SELECT * FROM sales..creditcard",
+        'SELECT * FROM "".secret',
+    ],
+)
+def test_fast_path_defers_unmodelled_names_to_sqlparse(guard, sql):
+    assert guard._fast_validate(sql) is None
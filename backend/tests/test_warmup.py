@@ -0,0 +1,25 @@
+import threading
+
+from backend.orchestrator import warmup
+
+
+def test_start_warmup_runs_each_preload_once(monkeypatch):
+    calls = []
+    done = threading.Barrier(3, timeout=5)
+
+    def record(name):
+        def preload():
+            calls.append(name)
+            done.wait()
+
+        return preload
+
+    monkeypatch.setattr(warmup, "_started", False)
+    monkeypatch.setattr(warmup, "_preload_schema", record("schema"))
+    monkeypatch.setattr(warmup, "_preload_llm", record("llm"))
+
+    warmup.start_warmup()
+    warmup.start_warmup()
+    done.wait()
+
+    assert sorted(calls) == ["llm", "schema"]
@@ -0,0 +1,55 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+def normalize_text(text: str) -> str:
+    """
+    Whitespace-insensitive form of free text, for cache keys. Case is kept:
+    questions may carry case-sensitive literals (name = 'McDonald').
+    """
+    return " ".join((text or "").split())
+
+
+def make_key(*parts: str) -> bytes:
+    """Build a compact digest key from string parts."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update((part or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.digest()
+
+
+class LRUCache:
+    """Small thread-safe LRU cache with a fixed number of entries."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -31,8 +31,8 @@ def load_env(env_filename: str = ".env") -> str:
 
     # Log debug info
     if os.path.exists(env_path):
-        logging.info(f"✅ Environment loaded from: {env_path}")
+        logging.info("✅ Environment loaded from: %s", env_path)
     else:
-        logging.warning(f"⚠️ Environment file not found: {env_path}")
+        logging.warning("⚠️ Environment file not found: %s", env_path)
 
     return env_path
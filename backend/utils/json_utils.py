@@ -0,0 +1,21 @@
+from decimal import Decimal
+
+import orjson
+
+
+def json_default(obj):
+    """
+    Fallback hook for orjson.dumps.
+    orjson serializes datetime/date natively; this handles the rest
+    (Decimal -> float, anything else -> str).
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return str(obj)
+
+
+def dumps_rows(rows) -> str:
+    """Serialize SQL result rows for embedding in LLM prompts."""
+    return orjson.dumps(
+        rows, default=json_default, option=orjson.OPT_NON_STR_KEYS
+    ).decode()
@@ -1,5 +1,8 @@
 # backend/utils/logger.py
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
 from opentelemetry import trace
@@ -32,16 +35,22 @@ formatter = logging.Formatter(
     datefmt="%Y-%m-%d %H:%M:%S"
 )
 handler.setFormatter(formatter)
-logger.addHandler(handler)
+# Request threads only enqueue records; a background listener does the stdout I/O
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+listener = logging.handlers.QueueListener(log_queue, handler)
+listener.start()
+atexit.register(listener.stop)
 
 # === Instrument logging to integrate with OpenTelemetry ===
 #LoggingInstrumentor().instrument(set_logging_format=True)
 
 # === Helper function for centralized logging ===
-def log_with_task(level: int, message: str, task: str = "General"):
+def log_with_task(level: int, message: str, *args, task: str = "General"):
     """
     Log a message with a specific task context.
     This adds a 'task' field for consistent formatting and OpenTelemetry integration.
+    Pass %-style args instead of pre-formatting, so filtered-out records cost nothing.
     """
     extra = {"task": task}
-    logger.log(level, message, extra=extra)
+    logger.log(level, message, *args, extra=extra)
@@ -1,8 +1,19 @@
 import re
-import json
+import orjson
 import pandas as pd
 import altair as alt
-from backend.services.openai_client import OpenAIClient
+from backend.services.openai_client import OpenAIClient, response_text
+
+# Intent keywords in the user question, checked in order
+_NL_INTENTS = (
+    (re.compile(r"trend|over time|by month|per day|growth"), "time_series"),
+    (re.compile(r"compare|top|rank|most|least|highest|lowest"), "bar"),
+    (re.compile(r"distribution|histogram|spread|range"), "histogram"),
+    (re.compile(r"relationship|correlation|impact"), "scatter"),
+    (re.compile(r"share|percentage|ratio|portion"), "pie"),
+)
+# Grouping/aggregation in the SQL suggests a bar chart
+_SQL_AGGREGATE_RE = re.compile(r"group by|sum|avg|count")
 
 
 class VisualizationRecommender:
@@ -24,22 +35,11 @@ class VisualizationRecommender:
     # -------------------------------------------------------------------------
     def _heuristic_intent(self) -> str:
         nl_lower = self.nl_query.lower()
-        sql_lower = self.sql_query.lower()
+        for pattern, intent in _NL_INTENTS:
+            if pattern.search(nl_lower):
+                return intent
 
-        if re.search(r"trend|over time|by month|per day|growth", nl_lower):
-            return "time_series"
-        if re.search(r"compare|top|rank|most|least|highest|lowest", nl_lower):
-            return "bar"
-        if re.search(r"distribution|histogram|spread|range", nl_lower):
-            return "histogram"
-        if re.search(r"relationship|correlation|impact", nl_lower):
-            return "scatter"
-        if re.search(r"share|percentage|ratio|portion", nl_lower):
-            return "pie"
-
-        if "group by" in sql_lower:
-            return "bar"
-        if "sum" in sql_lower or "avg" in sql_lower or "count" in sql_lower:
+        if _SQL_AGGREGATE_RE.search(self.sql_query.lower()):
             return "bar"
 
         return "table"
@@ -75,8 +75,8 @@ class VisualizationRecommender:
 
         try:
             response = self.llm.invoke(prompt)
-            text = response.content if hasattr(response, "content") else str(response)
-            result = json.loads(text)
+            text = response_text(response)
+            result = orjson.loads(text)
             return result
         except Exception as e:
             # Fallback
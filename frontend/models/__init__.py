@@ -1,13 +1,3 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from .api_models import SQLQueryRequest, SQLQueryResponse
 
-class SQLQueryResponse(BaseModel):
-    """Model for the response returned by the backend agent."""
-    result: str                        # Generated SQL
-    rows: Optional[List[Dict[str, Any]]] = None  # Query results, if any
-    execution_time: Optional[float] = None      # Optional: execution time in seconds
-    row_count: Optional[int] = None             # Optional: number of rows returned
-
-class SQLQueryRequest(BaseModel):
-    """Model for the request sent to the backend agent."""
-    query: str
+__all__ = ["SQLQueryRequest", "SQLQueryResponse"]
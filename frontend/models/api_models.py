@@ -11,6 +11,8 @@ class SQLQueryResponse(BaseModel):
     visualization: Optional[dict] = None # Recommended visualization details
     regenerations_used: Optional[int] = 0
     execution_time: Optional[float] = None  # Query execution time in seconds
+    row_count: Optional[int] = None     # Rows returned (after any row limit)
+    truncated: bool = False             # True if the backend row limit cut the result
 
     class Config:
         # Handle non-JSON-serializable types like Decimal
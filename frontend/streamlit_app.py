@@ -1,128 +1,252 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
-import json
+import orjson
 import pandas as pd
+import pyarrow as pa
 from dotenv import load_dotenv
-from models.api_models import SQLQueryRequest, SQLQueryResponse
+from models.api_models import SQLQueryResponse
 from pydantic import ValidationError
-from decimal import Decimal
 
 # Load environment variables
 load_dotenv()
 API_URL = os.getenv("FUNCTION_API_URL", "http://localhost:7071/api/query")
+# (connect, read) seconds: an unreachable backend fails fast, a slow agent run does not
+REQUEST_TIMEOUT = (3, 90)
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """
+    One keep-alive HTTP session per server process, shared by all reruns and users.
+    """
+    session = requests.Session()
+    # Connect failures are retried for any method; status retries only for
+    # idempotent ones (HEAD/GET)
+    retries = Retry(total=2, backoff_factor=0.2, status_forcelist=[429, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    # The backend gzips large results; requests decodes them transparently
+    session.headers["Accept-Encoding"] = "gzip"
+    # Open the pooled (TLS) connection now rather than on the first question.
+    # The query route only accepts POST, so HEAD is rejected without running the agent.
+    try:
+        session.head(API_URL, timeout=3)
+    except requests.exceptions.RequestException:
+        pass
+    return session
+
+
+class UncachedResponse(Exception):
+    """Hands a backend response out of run_query without caching it."""
+
+    def __init__(self, content: bytes):
+        super().__init__("uncached response")
+        self.content = content
+
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def run_query(nl_query: str) -> bytes:
+    """
+    Send a question to the backend and return the raw JSON response body.
+    Successful answers are cached per question; failed ones are not.
+    """
+    # Same shape as SQLQueryRequest; a str field needs no pydantic validation
+    payload = orjson.dumps({"query": nl_query})
+    response = get_session().post(
+        API_URL,
+        data=payload,
+        headers={"Content-Type": "application/json"},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+
+    result = orjson.loads(response.content)
+    if "error" in result or result.get("validation") != "VALID":
+        raise UncachedResponse(response.content)
+    # Raw bytes: orjson parses them directly, so no decoded str copy is kept
+    return response.content
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def to_dataframe(response_body: bytes) -> pd.DataFrame:
+    """Build the results DataFrame once per backend response; reruns reuse it."""
+    rows = orjson.loads(response_body).get("data") or []
+    try:
+        # Arrow's C++ row conversion is much faster than pandas' list-of-dicts
+        # constructor, and yields columns st.dataframe can serialize as-is
+        return pa.Table.from_pylist(rows).to_pandas()
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+
+    df = pd.DataFrame(rows)
+    # Mixed-type (object) columns are made strings once here, so Arrow
+    # serialization in st.dataframe cannot fail on them; nulls stay null
+    for column in df.select_dtypes("object").columns:
+        df[column] = df[column].astype(str).mask(df[column].isna())
+    return df
+
+
+PAGE_SIZE_OPTIONS = (50, 100, 500)
+# Wider results get a column picker, starting with this many columns shown
+DEFAULT_VISIBLE_COLUMNS = 10
+
+
+def show_paginated(df: pd.DataFrame) -> None:
+    """
+    Render one page of the selected columns,
+    so only that slice is serialized to the browser.
+    """
+    columns = df.columns.tolist()
+    if len(columns) > DEFAULT_VISIBLE_COLUMNS:
+        columns = st.multiselect(
+            "Columns", columns, default=columns[:DEFAULT_VISIBLE_COLUMNS]
+        )
+        df = df[columns]
+    column_config = {
+        column: st.column_config.NumberColumn(format="%.4f")
+        for column in df.select_dtypes("float").columns
+    }
+
+    if len(df) <= PAGE_SIZE_OPTIONS[0]:
+        st.dataframe(df, use_container_width=True, column_config=column_config)
+        return
+
+    size_col, page_col = st.columns(2)
+    page_size = size_col.selectbox("Rows per page", PAGE_SIZE_OPTIONS)
+    pages = (len(df) - 1) // page_size + 1
+    page = page_col.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+    start = (page - 1) * page_size
+    st.dataframe(
+        df.iloc[start:start + page_size],
+        use_container_width=True,
+        column_config=column_config,
+    )
+    st.caption(f"Page {page} of {pages}")
+
 
 # Streamlit page setup
 st.set_page_config(page_title="🧠 Text-to-SQL Agent", layout="wide")
 st.title("🧑‍💻 Text-to-SQL Agent on Azure")
 st.write("Ask a question in natural language — the agent will generate, validate, and execute SQL, then summarize the results.")
+# Create (and warm) the shared session on page load, before the first question
+get_session()
 
 # Input form
 with st.form("query_form"):
     nl_query = st.text_area("💬 Your question:", height=120, placeholder="e.g. Show me the 10 most recent orders")
     submitted = st.form_submit_button("🚀 Run Query")
 
-def convert_decimals(obj):
-    """Recursively convert Decimal values to float for display."""
-    if isinstance(obj, list):
-        return [convert_decimals(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {k: convert_decimals(v) for k, v in obj.items()}
-    elif isinstance(obj, Decimal):
-        return float(obj)
-    else:
-        return obj
-
+# Keep showing the last question's results when a result widget (e.g. the
+# paginator) triggers a rerun; `submitted` is only True on the submit rerun
 if submitted and nl_query.strip():
-    try:
-        # Validate and send request
-        payload = SQLQueryRequest(query=nl_query).model_dump()
-
-        with st.spinner("🤖 The agent is thinking..."):
-            response = requests.post(API_URL, json=payload, timeout=90)
-
-        if response.status_code == 200:
-            try:
-                data: SQLQueryResponse = SQLQueryResponse.parse_raw(response.text)
-                st.success("✅ Query processed successfully!")
-
-                # --- SQL Query Section ---
-                st.subheader("🧩 Generated SQL Query")
-                if data.sql_query:
-                    st.code(data.sql_query, language="sql")
-                else:
-                    st.info("No SQL query was generated.")
-
-                # --- Validation Section ---
-                if data.validation:
-                    st.caption(f"Validation: **{data.validation}**")
-                if data.regenerations_used is not None:
-                    st.caption(f"Regenerations used: {data.regenerations_used}")
-
-                # --- Data Section ---
-                st.subheader("📊 SQL Query Results")
-                if data.data:
-                    df_data = convert_decimals(data.data)
-                    try:
-                        df = pd.DataFrame(df_data)
-                        st.dataframe(df, use_container_width=True)
-                        st.caption(f"Rows returned: {len(df)}")
-                    except Exception:
-                        st.json(df_data)
-                else:
-                    st.info("No data was returned from the SQL query.")
-                
-                # --- Visualization Section ---
-                st.subheader("📈 Recommended Visualization")
-                #data = data.data #result.get("data", [])
-                viz = data.visualization #result.get("visualization", {})
-                if isinstance(viz, str):
-                    try:
-                        viz = json.loads(viz)
-                    except json.JSONDecodeError:
-                        viz = {"chart_type": "table"}
-
-                if not data:
-                    st.info("No data to visualize.")
-                else:
-                    df = pd.DataFrame(data.data)
-                    chart_type = viz.get("chart_type", "table")
-                    x_axis = viz.get("x_axis")
-                    y_axis = viz.get("y_axis")
-                    title = viz.get("title", "Data Visualization")
-
-                    st.markdown(f"### {title}")
-
-                    if chart_type == "bar" and x_axis and y_axis:
-                        st.bar_chart(df.set_index(x_axis)[y_axis])
-                    elif chart_type == "line" and x_axis and y_axis:
-                        st.line_chart(df.set_index(x_axis)[y_axis])
-                    elif chart_type == "area" and x_axis and y_axis:
-                        st.area_chart(df.set_index(x_axis)[y_axis])
-                    elif chart_type == "scatter" and x_axis and y_axis:
-                        st.scatter_chart(df, x=x_axis, y=y_axis)
-                    else:
-                        st.dataframe(df)
-                
-                # --- LLM Answer Section ---
-                st.subheader("🗣️ LLM-Generated Answer")
-                if data.answer:
-                    st.markdown(f"**Answer:** {data.answer}")
-                else:
-                    st.info("No answer was generated from the data.")
-
-                # --- Execution Metadata ---
-                if data.execution_time:
-                    st.caption(f"Execution time: {data.execution_time:.2f}s")
-
-            except ValidationError as ve:
-                st.error(f"Invalid response format: {ve}")
+    st.session_state["active_query"] = nl_query
+active_query = st.session_state.get("active_query")
 
+if active_query:
+    try:
+        # Reruns and repeat submits of the same question reuse this session's
+        # last answer without even a run_query cache lookup
+        if (
+            st.session_state.get("last_q") == active_query
+            and "last_resp" in st.session_state
+        ):
+            response_body = st.session_state["last_resp"]
         else:
-            st.error(f"❌ Error {response.status_code}: {response.text}")
-
-    except ValidationError as ve:
-        st.error(f"Invalid request: {ve}")
+            with st.spinner("🤖 The agent is thinking..."):
+                try:
+                    response_body = run_query(active_query)
+                    st.session_state["last_q"] = active_query
+                    st.session_state["last_resp"] = response_body
+                except UncachedResponse as uncached:
+                    response_body = uncached.content
+
+        try:
+            raw = orjson.loads(response_body)
+            # Rows go straight to the DataFrame; pydantic only checks the scalar fields
+            rows = raw.pop("data", None)
+            data: SQLQueryResponse = SQLQueryResponse.model_validate(raw)
+            st.success("✅ Query processed successfully!")
+
+            # --- SQL Query Section ---
+            st.subheader("🧩 Generated SQL Query")
+            if data.sql_query:
+                st.code(data.sql_query, language="sql")
+            else:
+                st.info("No SQL query was generated.")
+
+            # --- Validation Section ---
+            if data.validation:
+                st.caption(f"Validation: **{data.validation}**")
+            if data.regenerations_used is not None:
+                st.caption(f"Regenerations used: {data.regenerations_used}")
+
+            # --- Data Section ---
+            st.subheader("📊 SQL Query Results")
+            if rows:
+                df = to_dataframe(response_body)
+                if data.truncated:
+                    st.warning(
+                        f"⚠️ Only the first {len(df)} rows are shown; the result was "
+                        "cut off at the backend row limit."
+                    )
+                show_paginated(df)
+                st.caption(f"Rows returned: {len(df)}")
+            else:
+                st.info("No data was returned from the SQL query.")
+            
+            # --- Visualization Section ---
+            st.subheader("📈 Recommended Visualization")
+            #data = data.data #result.get("data", [])
+            viz = data.visualization #result.get("visualization", {})
+            if isinstance(viz, str):
+                try:
+                    viz = orjson.loads(viz)
+                except orjson.JSONDecodeError:
+                    viz = {"chart_type": "table"}
+
+            if not data:
+                st.info("No data to visualize.")
+            else:
+                df = to_dataframe(response_body)
+                chart_type = viz.get("chart_type", "table")
+                x_axis = viz.get("x_axis")
+                y_axis = viz.get("y_axis")
+                title = viz.get("title", "Data Visualization")
+
+                st.markdown(f"### {title}")
+
+                if chart_type == "bar" and x_axis and y_axis:
+                    st.bar_chart(df.set_index(x_axis)[y_axis])
+                elif chart_type == "line" and x_axis and y_axis:
+                    st.line_chart(df.set_index(x_axis)[y_axis])
+                elif chart_type == "area" and x_axis and y_axis:
+                    st.area_chart(df.set_index(x_axis)[y_axis])
+                elif chart_type == "scatter" and x_axis and y_axis:
+                    st.scatter_chart(df, x=x_axis, y=y_axis)
+                else:
+                    st.dataframe(df)
+            
+            # --- LLM Answer Section ---
+            st.subheader("🗣️ LLM-Generated Answer")
+            if data.answer:
+                st.markdown(f"**Answer:** {data.answer}")
+            else:
+                st.info("No answer was generated from the data.")
+
+            # --- Execution Metadata ---
+            if data.execution_time:
+                st.caption(f"Execution time: {data.execution_time:.2f}s")
+
+        except (ValidationError, orjson.JSONDecodeError) as ve:
+            st.error(f"Invalid response format: {ve}")
+
+    except requests.exceptions.HTTPError as he:
+        st.error(f"❌ Error {he.response.status_code}: {he.response.text}")
     except requests.exceptions.Timeout:
         st.error("⏳ The request timed out. Try again or check your API.")
     except Exception as e: